@@ -1,58 +1,92 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from pydantic import BaseModel
-import joblib
+import json
 import logging
+import threading
 
 # Logging
 logging.basicConfig(level=logging.INFO)
 
-# Load model and encoder
-model = joblib.load("backend/symptom_model.pkl")
-mlb = joblib.load("backend/mlb.pkl")
+# Loading the predictor validates the model bundle before the app starts
+from backend.predictor import (INFERENCE_WORKERS, current_bundle, inference_pool, knowledge_base,
+                               model_version, predict_many, predict_one, shutdown)
+from tracing import REQUEST_ID_HEADER, trace
+
+FEEDBACK_LOG = "backend/feedback.jsonl"
+_feedback_lock = threading.Lock()
 
 # FastAPI app
 app = FastAPI()
 
+@app.on_event("startup")
+def start_inference_workers():
+    """With INFERENCE_WORKERS set, start the worker pool before the first request"""
+    if INFERENCE_WORKERS:
+        inference_pool(current_bundle())
+
+@app.on_event("shutdown")
+def stop_inference_workers():
+    shutdown()
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Trace each request under the caller's X-Request-ID, or a new one"""
+    with trace(f"{request.method} {request.url.path}", request.headers.get(REQUEST_ID_HEADER)) as current:
+        response = await call_next(request)
+    response.headers[REQUEST_ID_HEADER] = current.request_id
+    return response
+
 # Input schema
 class SymptomRequest(BaseModel):
     symptoms: list[str]
 
-# Medical advice dictionary
-medical_advice = {
-   "Bacterial Infection": "Antibiotics may be needed. Consult a doctor.",
-    "Viral Infection": "Rest and hydration. Use OTC fever reducers if needed.",
-    "migraine": "Avoid triggers, use pain relievers, and rest in a dark room.",
-    "dengue": "Emergency! Hydrate and seek immediate medical care.",
-    "cold": "Rest, fluids, and OTC cold medicine.",
-    "Heart disease": "EMERGENCY! Call for medical help immediately.",
-    "food poisoning": "Hydrate and monitor. Seek help if severe.",
-    "Respiratory Infection": "Consider cough syrup. See doctor if worsens.",
-    "Tension Headache": "Rest, hydration, and OTC pain relievers."
-}
+class BatchSymptomRequest(BaseModel):
+    requests: list[list[str]]
+
+class FeedbackRequest(BaseModel):
+    symptoms: list[str]
+    disease: str
 
 @app.get("/")
 def read_root():
-    return {"message": "Backend is running."}
+    return {"message": "Backend is running.", "model_version": model_version()}
 
 @app.post("/predict")
 def predict(request: SymptomRequest):
     logging.info(f"Symptoms received: {request.symptoms}")
     try:
-        # Transform input
-        input_vector = mlb.transform([request.symptoms])
-        prediction = model.predict(input_vector)[0]
-        
-        # Get advice
-        advice = medical_advice.get(prediction, "No specific advice available. Consult a doctor.")
-
-        return {
-            "disease": prediction,
-            "advice": advice
-        }
+        return predict_one(request.symptoms)
     except Exception as e:
         logging.error(f"Prediction error: {e}")
         return {"error": str(e)}
 
+@app.post("/predict/batch")
+def predict_batch(request: BatchSymptomRequest):
+    """Predict for many symptom lists with one encoder and model call"""
+    try:
+        return {"results": predict_many(request.requests)}
+    except Exception as e:
+        logging.error(f"Batch prediction error: {e}")
+        return {"error": str(e)}
 
+@app.get("/conditions")
+def conditions(names: str = "", offset: int = 0, limit: int = 50):
+    """Knowledge base entries, either for comma-separated names or one page of all"""
+    wanted = [n.strip() for n in names.split(",") if n.strip()] or None
+    return {
+        "total": len(knowledge_base),
+        "conditions": knowledge_base.subset(wanted, offset=offset, limit=limit)
+    }
 
-
+@app.post("/feedback")
+def feedback(request: FeedbackRequest):
+    """Record a clinician-confirmed diagnosis for the incremental update job"""
+    symptoms = [s.strip() for s in request.symptoms if s.strip()]
+    disease = request.disease.strip()
+    if not symptoms or not disease:
+        return {"error": "Both symptoms and disease are required."}
+    line = json.dumps({"symptoms": symptoms, "disease": disease}) + "\n"
+    with _feedback_lock:
+        with open(FEEDBACK_LOG, "a", encoding="utf-8") as f:
+            f.write(line)
+    return {"status": "recorded"}
@@ -1,14 +1,16 @@
+import os
+
 import joblib
-from sklearn.preprocessing import MultiLabelBinarizer
 
-# List of all possible symptoms
-all_symptoms = ["fever","Body pain","cough", "fatigue", "headache"]
+from model_bundle import BACKEND_DIR, load_model_bundle
 
-# Create MultiLabelBinarizer object
-mlb = MultiLabelBinarizer()
-mlb.fit([all_symptoms])
+# The encoder now ships inside the model bundle. This exports a legacy
+# mlb.pkl from the bundle's vocabulary so it always matches the model,
+# rather than fitting a separate hand-written symptom list.
+bundle = load_model_bundle()
 
-# Save the binarizer
-joblib.dump(mlb, "mlb.pkl")
+# Save the binarizer next to the bundle, not in the current directory
+mlb_path = os.path.join(BACKEND_DIR, "mlb.pkl")
+joblib.dump(bundle.mlb, mlb_path)
 
-print("mlb.pkl file created successfully ✅")
+print(f"{mlb_path} exported from model v{bundle.version} ({len(bundle.vocabulary)} symptoms) ✅")
@@ -0,0 +1,390 @@
+"""Process-pool inference over model arrays in shared memory.
+
+The parent flattens the model into plain numpy arrays and copies them once
+into a multiprocessing.shared_memory block. Workers attach to that block
+and predict on zero-copy views of it, so adding workers adds cores without
+adding model copies. Requests arriving within a millisecond or so of each
+other are batched into one task to keep queue traffic low. Each batch goes
+to one worker over that worker's own pipe, so a crashed worker loses only
+its own batches and is restarted.
+
+Supported models: MultinomialNB, and RandomForestClassifier or
+DecisionTreeClassifier (trees are evaluated by a vectorized numpy traversal).
+Exported arrays are checked against model.predict before a pool starts;
+`python -m backend.inference_pool` runs the same check on the shipped model.
+"""
+import itertools
+import logging
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import connection as mp_connection, shared_memory
+
+import numpy as np
+
+BATCH_MAX_ROWS = int(os.environ.get("INFERENCE_BATCH_ROWS", 64))
+BATCH_WAIT_SECONDS = float(os.environ.get("INFERENCE_BATCH_WAIT", 0.001))
+RESULT_TIMEOUT = 30.0
+VERIFY_CHUNK_ROWS = 256  # rows per model.predict call when checking an export
+_ALIGN = 64
+
+
+class UnsupportedModelError(Exception):
+    """Raised for models that can't be flattened into shared arrays"""
+
+
+def export_model(model):
+    """Flatten a model into (kind, arrays) that a worker can evaluate with numpy alone"""
+    name = type(model).__name__
+    if name == "MultinomialNB":
+        return "nb", {
+            "feature_log_prob": np.ascontiguousarray(model.feature_log_prob_.T, dtype=np.float64),
+            "class_log_prior": np.ascontiguousarray(model.class_log_prior_, dtype=np.float64),
+        }
+    if name in ("RandomForestClassifier", "DecisionTreeClassifier"):
+        trees = [est.tree_ for est in getattr(model, "estimators_", [model])]
+        left, right, feature, threshold, value, roots = [], [], [], [], [], []
+        offset = 0
+        for tree in trees:
+            roots.append(offset)
+            # Child ids are per tree; shift them into the concatenated arrays
+            left.append(np.where(tree.children_left >= 0, tree.children_left + offset, -1))
+            right.append(np.where(tree.children_right >= 0, tree.children_right + offset, -1))
+            feature.append(tree.feature)
+            threshold.append(tree.threshold)
+            counts = tree.value[:, 0, :]
+            value.append(counts / np.maximum(counts.sum(axis=1, keepdims=True), 1e-12))
+            offset += tree.node_count
+        return "forest", {
+            "left": np.concatenate(left).astype(np.int32),
+            "right": np.concatenate(right).astype(np.int32),
+            "feature": np.concatenate(feature).astype(np.int32),
+            "threshold": np.concatenate(threshold).astype(np.float64),
+            "value": np.concatenate(value).astype(np.float64),
+            "roots": np.asarray(roots, dtype=np.int32),
+        }
+    raise UnsupportedModelError(f"{name} can't be served from shared memory")
+
+
+def predict_arrays(kind, arrays, X):
+    """Class indices for a dense feature matrix, matching the model's own predict()"""
+    if kind == "nb":
+        return np.argmax(X @ arrays["feature_log_prob"] + arrays["class_log_prior"], axis=1)
+    left, right, feature, threshold, value = (arrays[k] for k in ("left", "right", "feature", "threshold", "value"))
+    proba = np.zeros((X.shape[0], value.shape[1]))
+    rows = np.arange(X.shape[0])
+    for root in arrays["roots"]:
+        nodes = np.full(X.shape[0], root, dtype=np.int32)
+        inner = left[nodes] >= 0
+        while inner.any():
+            current = nodes[inner]
+            go_left = X[rows[inner], feature[current]] <= threshold[current]
+            nodes[inner] = np.where(go_left, left[current], right[current])
+            inner = left[nodes] >= 0
+        proba += value[nodes]
+    return np.argmax(proba, axis=1)
+
+
+def _pack(arrays):
+    """Copy arrays into one shared memory block; returns the block and a layout to attach by"""
+    layout, offset = {}, 0
+    for name, array in arrays.items():
+        offset = -(-offset // _ALIGN) * _ALIGN
+        layout[name] = (offset, array.shape, array.dtype.str)
+        offset += array.nbytes
+    shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    for name, array in arrays.items():
+        start, shape, dtype = layout[name]
+        np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=start)[...] = array
+    return shm, layout
+
+
+def _attach(shm_name, layout):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    arrays = {}
+    for name, (start, shape, dtype) in layout.items():
+        view = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=start)
+        view.flags.writeable = False
+        arrays[name] = view
+    return shm, arrays
+
+
+def _encode(index, symptom_lists):
+    X = np.zeros((len(symptom_lists), len(index)), dtype=np.float64)
+    for row, symptoms in enumerate(symptom_lists):
+        for symptom in symptoms:
+            column = index.get(symptom)
+            if column is not None:  # Unknown symptoms are ignored, as MultiLabelBinarizer does
+                X[row, column] = 1.0
+    return X
+
+
+def verify_export(model, labels, kind, arrays, vocabulary_size, samples=256, seed=0):
+    """Raise UnsupportedModelError unless predict_arrays agrees with model.predict.
+
+    Checked on the empty input, every single-symptom input and a fixed set
+    of random symptom combinations.
+    """
+    labels = np.asarray(labels, dtype=object)
+    mismatches = checked = 0
+    for X in _verification_inputs(vocabulary_size, samples, seed):
+        expected = np.asarray(model.predict(X))
+        mismatches += int(np.sum(labels[predict_arrays(kind, arrays, X)] != expected))
+        checked += len(X)
+    if mismatches:
+        raise UnsupportedModelError(
+            f"Exported {type(model).__name__} disagrees with model.predict on {mismatches}/{checked} inputs")
+
+
+def _verification_inputs(vocabulary_size, samples, seed, chunk_rows=VERIFY_CHUNK_ROWS):
+    """verify_export's inputs in blocks of chunk_rows, so no vocabulary-sized identity matrix is built"""
+    yield np.zeros((1, vocabulary_size))
+    for start in range(0, vocabulary_size, chunk_rows):
+        columns = np.arange(start, min(start + chunk_rows, vocabulary_size))
+        X = np.zeros((len(columns), vocabulary_size))
+        X[np.arange(len(columns)), columns] = 1.0
+        yield X
+    rng = np.random.default_rng(seed)
+    density = min(5 / max(vocabulary_size, 1), 0.5)
+    for start in range(0, samples, chunk_rows):
+        rows = min(chunk_rows, samples - start)
+        yield (rng.random((rows, vocabulary_size)) < density).astype(np.float64)
+
+
+def _worker_main(shm_name, layout, kind, vocabulary, tasks, results):
+    shm, arrays = _attach(shm_name, layout)
+    index = {symptom: i for i, symptom in enumerate(vocabulary)}
+    try:
+        while True:
+            try:
+                task = tasks.recv()
+            except EOFError:
+                break
+            if task is None:
+                break
+            task_id, symptom_lists = task
+            try:
+                results.send((task_id, predict_arrays(kind, arrays, _encode(index, symptom_lists)).tolist(), None))
+            except Exception as e:
+                results.send((task_id, None, repr(e)))
+    finally:
+        arrays.clear()
+        shm.close()
+
+
+class PoolClosedError(RuntimeError):
+    """Raised by predict() once the pool has started closing"""
+
+
+class _Worker:
+    """One worker process with its own task and result pipes"""
+
+    def __init__(self, ctx, name, args):
+        self.tasks, child_tasks = ctx.Pipe(duplex=False)[::-1]
+        self.results, child_results = ctx.Pipe(duplex=False)
+        self.process = ctx.Process(target=_worker_main, name=name, daemon=True,
+                                   args=(*args, child_tasks, child_results))
+        self.process.start()
+        # The child holds its own copies now
+        child_tasks.close()
+        child_results.close()
+        self.in_flight = set()  # task ids sent to this worker and not yet answered
+
+    def close(self):
+        self.tasks.close()
+        self.results.close()
+
+
+class InferencePool:
+    """Worker processes predicting on shared model arrays.
+
+    predict() may be called from many threads at once; calls are batched
+    and sent to the least busy worker, and each caller blocks on its own
+    result. A worker that dies fails only the batches it was holding and
+    is replaced.
+    """
+
+    def __init__(self, bundle, workers):
+        self.bundle = bundle
+        kind, arrays = export_model(bundle.model)
+        self._labels = list(bundle.labels)
+        verify_export(bundle.model, self._labels, kind, arrays, len(bundle.vocabulary))
+        self._shm, layout = _pack(arrays)
+        self._ctx = mp.get_context("spawn")
+        self._worker_args = (self._shm.name, layout, kind, list(bundle.vocabulary))
+        self._lock = threading.Lock()
+        self._workers = [self._spawn(i) for i in range(workers)]
+        self._pending = queue.Queue()
+        self._futures = {}  # task id -> (worker, [(future, symptom_lists), ...])
+        self._ids = itertools.count()
+        self._closed = False
+        self._stopped = False
+        self._outstanding = 0  # predict() calls not yet answered
+        threading.Thread(target=self._dispatch, name="inference-dispatch", daemon=True).start()
+        threading.Thread(target=self._collect, name="inference-collect", daemon=True).start()
+        logging.info(f"Inference pool: {workers} workers sharing {self._shm.size / 1024:.0f} KiB of {kind} arrays")
+
+    def _spawn(self, slot):
+        return _Worker(self._ctx, f"inference-{slot}", self._worker_args)
+
+    def predict(self, symptom_lists):
+        """Predicted labels for a list of symptom lists"""
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise PoolClosedError("Inference pool is closed")
+            self._outstanding += 1
+            # Queued under the lock, so nothing can land behind close()'s sentinel
+            self._pending.put((future, list(symptom_lists)))
+        try:
+            return future.result(timeout=RESULT_TIMEOUT)
+        finally:
+            with self._lock:
+                self._outstanding -= 1
+
+    def _dispatch(self):
+        while True:
+            item = self._pending.get()
+            if item is None:
+                return
+            batch, rows = [item], len(item[1])
+            deadline = time.monotonic() + BATCH_WAIT_SECONDS
+            while rows < BATCH_MAX_ROWS:
+                try:
+                    item = self._pending.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._pending.put(None)
+                    break
+                batch.append(item)
+                rows += len(item[1])
+            task_id = next(self._ids)
+            with self._lock:
+                worker = min(self._workers, key=lambda w: len(w.in_flight))
+                worker.in_flight.add(task_id)
+                self._futures[task_id] = (worker, batch)
+            try:
+                worker.tasks.send((task_id, [symptoms for _, lists in batch for symptoms in lists]))
+            except OSError:
+                pass  # The worker is gone; _collect fails this batch when it replaces it
+
+    def _collect(self):
+        while not self._stopped:
+            with self._lock:
+                workers = list(self._workers)
+            waitables = {}
+            for worker in workers:
+                waitables[worker.results] = worker
+                waitables[worker.process.sentinel] = worker
+            for ready in mp_connection.wait(list(waitables), timeout=0.5):
+                worker = waitables[ready]
+                if ready is worker.results:
+                    self._receive(worker)
+                elif not self._stopped:
+                    # Take any answers it sent before dying, then replace it
+                    while self._receive(worker):
+                        pass
+                    self._replace(worker)
+
+    def _receive(self, worker):
+        """Resolve one result from a worker if one is waiting; False if none or the pipe is closed"""
+        try:
+            if not worker.results.poll():
+                return False
+            self._resolve(*worker.results.recv())
+        except (EOFError, OSError):
+            return False  # Its sentinel fires too
+        return True
+
+    def _resolve(self, task_id, indices, error):
+        with self._lock:
+            worker, batch = self._futures.pop(task_id, (None, []))
+            if worker is not None:
+                worker.in_flight.discard(task_id)
+        start = 0
+        for future, lists in batch:
+            if error is not None:
+                future.set_exception(RuntimeError(f"Inference worker failed: {error}"))
+            else:
+                future.set_result([self._labels[i] for i in indices[start:start + len(lists)]])
+            start += len(lists)
+
+    def _replace(self, worker):
+        """Fail a dead worker's batches and start a new process in its slot"""
+        with self._lock:
+            if worker not in self._workers:
+                return
+            lost = [self._futures.pop(task_id)[1] for task_id in worker.in_flight if task_id in self._futures]
+            slot = self._workers.index(worker)
+            self._workers[slot] = self._spawn(slot)
+        # Its sentinel can fire just before it is reapable; a short join sets exitcode
+        worker.process.join(timeout=1)
+        logging.error(f"Inference worker {worker.process.name} exited with code {worker.process.exitcode}; "
+                      f"failing {len(lost)} batches and restarting it")
+        worker.close()
+        for batch in lost:
+            for future, _ in batch:
+                future.set_exception(RuntimeError("Inference worker crashed"))
+
+    def close(self, drain_timeout=RESULT_TIMEOUT):
+        """Stop taking work, let queued and in-flight batches finish, then stop the workers"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._pending.put(None)
+        deadline = time.monotonic() + drain_timeout
+        while time.monotonic() < deadline:
+            with self._lock:
+                if not self._outstanding:
+                    break
+            time.sleep(0.01)
+        self._stopped = True
+        with self._lock:
+            workers = list(self._workers)
+        for worker in workers:
+            try:
+                worker.tasks.send(None)
+            except OSError:
+                pass
+        for worker in workers:
+            worker.process.join(timeout=5)
+            if worker.process.is_alive():
+                worker.process.terminate()
+            worker.close()
+        # Anyone still waiting would otherwise block until the timeout
+        with self._lock:
+            waiting = [future for _, batch in self._futures.values() for future, _ in batch]
+            self._futures.clear()
+        while True:
+            try:
+                item = self._pending.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                waiting.append(item[0])
+        for future in waiting:
+            if not future.done():
+                future.set_exception(PoolClosedError("Inference pool was closed"))
+        self._shm.close()
+        self._shm.unlink()
+
+
+def main():
+    """Check the exported arrays against model.predict for the shipped model"""
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from backend.model_bundle import load_model_bundle
+
+    bundle = load_model_bundle()
+    kind, arrays = export_model(bundle.model)
+    verify_export(bundle.model, list(bundle.labels), kind, arrays, len(bundle.vocabulary), samples=2048)
+    print(f"{type(bundle.model).__name__} ({kind}): exported arrays match model.predict")
+
+
+if __name__ == "__main__":
+    main()
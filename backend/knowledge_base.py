@@ -0,0 +1,72 @@
+import functools
+import json
+import os
+
+KB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "knowledge_base.json")
+DEFAULT_ADVICE = "No specific advice available. Consult a doctor."
+
+
+def normalize_name(name):
+    """Case- and whitespace-insensitive key for a condition name"""
+    return " ".join(str(name).split()).casefold()
+
+
+class KnowledgeBase:
+    """Disease → advice, medications and severity, indexed by name and alias"""
+
+    def __init__(self, conditions):
+        self.conditions = {}  # canonical name -> entry
+        self._index = {}      # normalized name or alias -> canonical name
+        for entry in conditions:
+            name = entry["name"]
+            self.conditions[name] = entry
+            for key in [name, *entry.get("aliases", [])]:
+                normalized = normalize_name(key)
+                if normalized in self._index and self._index[normalized] != name:
+                    raise ValueError(f"'{key}' refers to both {self._index[normalized]} and {name}")
+                self._index[normalized] = name
+
+    @classmethod
+    def from_file(cls, path=KB_PATH):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f)["conditions"])
+
+    def __len__(self):
+        return len(self.conditions)
+
+    def names(self):
+        """Canonical condition names in file order"""
+        return list(self.conditions)
+
+    def lookup(self, name):
+        """Entry for a condition name or alias in any case, or None"""
+        canonical = self._index.get(normalize_name(name))
+        return self.conditions[canonical] if canonical else None
+
+    def lookup_many(self, names):
+        """Entries for a batch of names, None where unknown"""
+        index, conditions = self._index, self.conditions
+        result = []
+        for name in names:
+            canonical = index.get(normalize_name(name))
+            result.append(conditions[canonical] if canonical else None)
+        return result
+
+    def advice(self, name, default=DEFAULT_ADVICE):
+        entry = self.lookup(name)
+        return entry["advice"] if entry else default
+
+    def subset(self, names=None, offset=0, limit=None):
+        """Entries for the given names (all if None), with optional paging"""
+        if names is None:
+            entries = list(self.conditions.values())
+        else:
+            entries = [entry for entry in self.lookup_many(names) if entry is not None]
+        end = None if limit is None else offset + limit
+        return entries[offset:end]
+
+
+@functools.lru_cache(maxsize=None)
+def get_knowledge_base(path=KB_PATH):
+    """Process-wide knowledge base, loaded on first use"""
+    return KnowledgeBase.from_file(path)
@@ -1,21 +1,175 @@
+import argparse
+import sys
+import time
+
+import numpy as np
 import pandas as pd
+from scipy import sparse
 from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import SGDClassifier
+from sklearn.naive_bayes import MultinomialNB
 from sklearn.preprocessing import MultiLabelBinarizer
-import joblib
 
-# Load dataset
-df = pd.read_csv("symptom_illness_dataset.csv")  # Use a real dataset here
-X = df["Symptoms"].str.split(",")
-y = df["Disease"]
+from model_bundle import BUNDLE_PATH, hash_file, save_bundle
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DATA_PATH = "symptom_illness_dataset.csv"  # Use a real dataset here
+CHUNK_SIZE = 100_000
+
+# Models that can be trained chunk by chunk with partial_fit
+INCREMENTAL_MODELS = {
+    "nb": lambda: MultinomialNB(),
+    "sgd": lambda: SGDClassifier(loss="log_loss"),
+}
+
+
+def peak_memory_mb():
+    """Peak resident memory of this process in MB, if the platform reports it"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KB on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def split_symptoms(series):
+    """Split comma-separated symptom strings into stripped lists"""
+    return [[s.strip() for s in str(value).split(",") if s.strip()] for value in series]
+
+
+def read_chunks(path, chunksize=CHUNK_SIZE):
+    """Yield (symptom_lists, diseases) for each chunk of the CSV"""
+    for chunk in pd.read_csv(path, usecols=["Symptoms", "Disease"], chunksize=chunksize):
+        chunk = chunk.dropna()
+        yield split_symptoms(chunk["Symptoms"]), chunk["Disease"].astype(str).to_numpy()
+
+
+def scan_vocabulary(path, chunksize=CHUNK_SIZE):
+    """First pass over the data: sorted symptom vocabulary and label list"""
+    symptoms, labels = set(), set()
+    for symptom_lists, diseases in read_chunks(path, chunksize):
+        for items in symptom_lists:
+            symptoms.update(items)
+        labels.update(diseases)
+    return sorted(symptoms), sorted(labels)
+
+
+def load_vocabulary(path):
+    """Read a fixed vocabulary, one symptom per line"""
+    with open(path, "r", encoding="utf-8") as f:
+        return sorted({line.strip() for line in f if line.strip()})
+
+
+def encode_chunk(symptom_lists, index):
+    """Encode symptom lists as a binary CSR matrix against a fixed vocabulary index"""
+    indptr = [0]
+    indices = []
+    for items in symptom_lists:
+        columns = {index[s] for s in items if s in index}
+        indices.extend(sorted(columns))
+        indptr.append(len(indices))
+    data = np.ones(len(indices), dtype=np.uint8)
+    return sparse.csr_matrix((data, np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64)),
+                             shape=(len(symptom_lists), len(index)))
+
+
+def train_in_memory(path, model_name, n_jobs):
+    """Original training path: whole CSV, dense encoding, random forest by default"""
+    df = pd.read_csv(path)
+    X = split_symptoms(df["Symptoms"])
+    y = df["Disease"]
+
+    mlb = MultiLabelBinarizer()
+    X_bin = mlb.fit_transform(X)
+
+    if model_name in INCREMENTAL_MODELS:
+        model = INCREMENTAL_MODELS[model_name]()
+    else:
+        model = RandomForestClassifier(n_jobs=n_jobs)
+    model.fit(X_bin, y)
+    return model, mlb
+
+
+def train_streaming(path, model_name, chunksize, n_jobs, vocabulary_path=None):
+    """Out-of-core training: chunked CSV reads and sparse features.
+
+    Incremental models are updated per chunk with partial_fit; the random
+    forest needs the full matrix, which is kept sparse.
+    """
+    timings = {}
+    start = time.perf_counter()
+    if vocabulary_path:
+        vocabulary = load_vocabulary(vocabulary_path)
+        labels = sorted({d for _, diseases in read_chunks(path, chunksize) for d in diseases})
+    else:
+        vocabulary, labels = scan_vocabulary(path, chunksize)
+    index = {symptom: i for i, symptom in enumerate(vocabulary)}
+    timings["vocabulary_s"] = time.perf_counter() - start
+    print(f"Vocabulary: {len(vocabulary)} symptoms, {len(labels)} diseases")
+
+    start = time.perf_counter()
+    rows = 0
+    if model_name in INCREMENTAL_MODELS:
+        model = INCREMENTAL_MODELS[model_name]()
+        classes = np.asarray(labels)
+        for symptom_lists, diseases in read_chunks(path, chunksize):
+            model.partial_fit(encode_chunk(symptom_lists, index), diseases, classes=classes)
+            rows += len(diseases)
+        timings["train_s"] = time.perf_counter() - start
+    else:
+        blocks, targets = [], []
+        for symptom_lists, diseases in read_chunks(path, chunksize):
+            blocks.append(encode_chunk(symptom_lists, index))
+            targets.append(diseases)
+            rows += len(diseases)
+        X = sparse.vstack(blocks, format="csr")
+        y = np.concatenate(targets)
+        del blocks, targets
+        timings["encode_s"] = time.perf_counter() - start
+        start = time.perf_counter()
+        model = RandomForestClassifier(n_jobs=n_jobs)
+        model.fit(X, y)
+        timings["train_s"] = time.perf_counter() - start
+
+    mlb = MultiLabelBinarizer(classes=vocabulary)
+    mlb.fit([])
+    timings["rows"] = rows
+    return model, mlb, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the symptom → disease model")
+    parser.add_argument("--data", default=DATA_PATH, help="CSV with Symptoms and Disease columns")
+    parser.add_argument("--mode", choices=["memory", "streaming"], default="memory")
+    parser.add_argument("--model", choices=["rf", *INCREMENTAL_MODELS], default="rf",
+                        help="Model family (both modes)")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Parallel jobs for the random forest")
+    parser.add_argument("--vocabulary", help="Fixed symptom vocabulary file, one per line")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.mode == "streaming":
+        model, mlb, timings = train_streaming(args.data, args.model, args.chunksize, args.n_jobs, args.vocabulary)
+    else:
+        model, mlb = train_in_memory(args.data, args.model, args.n_jobs)
+        timings = {}
+    timings["total_s"] = time.perf_counter() - start
+
+    # Save model, vocabulary and an advice snapshot as one bundle next to this script
+    save_bundle(model, mlb.classes_, training_data_hash=hash_file(args.data))
+    print(f"Model bundle written to {BUNDLE_PATH}")
 
-# Vectorize symptoms
-mlb = MultiLabelBinarizer()
-X_bin = mlb.fit_transform(X)
+    for name, value in timings.items():
+        print(f"{name}: {value:.2f}" if isinstance(value, float) else f"{name}: {value}")
+    peak = peak_memory_mb()
+    if peak is not None:
+        print(f"peak_memory_mb: {peak:.1f}")
 
-# Train model
-model = RandomForestClassifier()
-model.fit(X_bin, y)
 
-# Save model and encoder
-joblib.dump(model, "symptom_model.pkl")
-joblib.dump(mlb, "mlb.pkl")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+import hashlib
+import io
+import json
+import os
+import pickle
+import zipfile
+
+import joblib
+import numpy as np
+from sklearn.naive_bayes import MultinomialNB
+from sklearn.preprocessing import MultiLabelBinarizer
+
+try:
+    from backend.knowledge_base import get_knowledge_base
+except ImportError:  # Run as a script from inside backend/
+    from knowledge_base import get_knowledge_base
+
+BUNDLE_FORMAT = 1
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+BUNDLE_PATH = os.path.join(BACKEND_DIR, "symptom_model.bundle.npz")
+LEGACY_MODEL_PATH = os.path.join(BACKEND_DIR, "symptom_model.pkl")
+LEGACY_MLB_PATH = os.path.join(BACKEND_DIR, "mlb.pkl")
+
+# Naive Bayes models are stored as plain arrays; anything else is pickled
+NB_ARRAYS = ("class_count_", "feature_count_", "class_log_prior_", "feature_log_prob_")
+
+
+class BundleError(Exception):
+    """Raised when a model bundle is missing, corrupt or inconsistent"""
+
+
+class ModelBundle:
+    """A loaded model with its vocabulary, labels, advice table and metadata"""
+
+    def __init__(self, model, vocabulary, labels, advice, metadata):
+        self.model = model
+        self.vocabulary = vocabulary
+        self.labels = labels
+        self.advice = advice
+        self.metadata = metadata
+        self.mlb = MultiLabelBinarizer(classes=vocabulary)
+        self.mlb.fit([])
+
+    @property
+    def version(self):
+        return self.metadata.get("version", 1)
+
+
+def hash_file(path):
+    """SHA-256 of a file, used to record which training data built a bundle"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_training_data(X, y):
+    """SHA-256 of in-memory training examples (lists of symptoms and labels)"""
+    return hashlib.sha256(json.dumps([list(X), list(y)], sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def advice_for_labels(labels):
+    """Advice snapshot for each model label from the knowledge base"""
+    knowledge_base = get_knowledge_base()
+    return {str(label): knowledge_base.advice(label) for label in labels}
+
+
+def _checksum(array):
+    return hashlib.sha256(np.ascontiguousarray(array).tobytes()).hexdigest()
+
+
+def save_bundle(model, vocabulary, advice=None, path=BUNDLE_PATH, training_data_hash=None, version=1, extra=None):
+    """Write a model and everything needed to serve it to a single .npz file.
+
+    The output depends only on its inputs (sorted keys, no timestamps), so
+    the same training run always produces a byte-identical bundle.
+    """
+    vocabulary = [str(v) for v in vocabulary]
+    labels = [str(c) for c in model.classes_]
+    n_features = getattr(model, "n_features_in_", len(vocabulary))
+    if n_features != len(vocabulary):
+        raise BundleError(f"Model expects {n_features} features but the vocabulary has {len(vocabulary)}")
+
+    arrays = {
+        "vocabulary": np.asarray(vocabulary, dtype=str),
+        "labels": np.asarray(labels, dtype=str),
+    }
+    if isinstance(model, MultinomialNB):
+        model_type = "multinomial_nb"
+        params = {"alpha": model.alpha, "fit_prior": model.fit_prior}
+        for name in NB_ARRAYS:
+            arrays[f"model.{name}"] = np.asarray(getattr(model, name), dtype=np.float64)
+    else:
+        model_type = "pickle"
+        params = {}
+        arrays["model.pickle"] = np.frombuffer(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL), dtype=np.uint8)
+
+    metadata = {
+        "format": BUNDLE_FORMAT,
+        "version": version,
+        "model_type": model_type,
+        "model_class": type(model).__name__,
+        "model_params": params,
+        "feature_count": len(vocabulary),
+        "label_count": len(labels),
+        "training_data_sha256": training_data_hash,
+        "advice": dict(sorted((advice if advice is not None else advice_for_labels(labels)).items())),
+        "checksums": {name: _checksum(array) for name, array in sorted(arrays.items())},
+    }
+    metadata.update(extra or {})
+    arrays["metadata"] = np.frombuffer(json.dumps(metadata, sort_keys=True).encode("utf-8"), dtype=np.uint8)
+
+    tmp_path = f"{path}.tmp"
+    _write_npz(tmp_path, arrays)
+    os.replace(tmp_path, path)
+    return metadata
+
+
+def _write_npz(path, arrays):
+    """np.savez equivalent with fixed member order and timestamps"""
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_STORED) as zf:
+        for name, array in sorted(arrays.items()):
+            info = zipfile.ZipInfo(f"{name}.npy", date_time=(1980, 1, 1, 0, 0, 0))
+            buffer = io.BytesIO()
+            np.lib.format.write_array(buffer, np.asanyarray(array), allow_pickle=False)
+            zf.writestr(info, buffer.getvalue())
+
+
+def _build_model(metadata, arrays):
+    if metadata["model_type"] == "multinomial_nb":
+        model = MultinomialNB(**metadata["model_params"])
+        for name in NB_ARRAYS:
+            setattr(model, name, arrays[f"model.{name}"])
+        model.classes_ = arrays["labels"].astype(object)
+        model.n_features_in_ = metadata["feature_count"]
+        return model
+    return pickle.loads(arrays["model.pickle"].tobytes())
+
+
+def load_bundle(path=BUNDLE_PATH):
+    """Load and validate a bundle, raising BundleError on any inconsistency"""
+    try:
+        with np.load(path, allow_pickle=False) as npz:
+            arrays = {name: npz[name] for name in npz.files}
+    except FileNotFoundError:
+        raise BundleError(f"Model bundle not found: {path}")
+    except Exception as e:
+        raise BundleError(f"Unreadable model bundle {path}: {e}")
+
+    if "metadata" not in arrays:
+        raise BundleError(f"{path} has no metadata")
+    metadata = json.loads(arrays.pop("metadata").tobytes().decode("utf-8"))
+    if metadata.get("format") != BUNDLE_FORMAT:
+        raise BundleError(f"Unsupported bundle format {metadata.get('format')} (expected {BUNDLE_FORMAT})")
+
+    for name, expected in metadata["checksums"].items():
+        if name not in arrays or _checksum(arrays[name]) != expected:
+            raise BundleError(f"Checksum mismatch for '{name}' in {path}")
+
+    vocabulary = arrays["vocabulary"].tolist()
+    labels = arrays["labels"].tolist()
+    model = _build_model(metadata, arrays)
+    validate(model, vocabulary, labels, metadata)
+    return ModelBundle(model, vocabulary, labels, metadata["advice"], metadata)
+
+
+def validate(model, vocabulary, labels=None, metadata=None):
+    """Check that a model, its vocabulary and labels describe the same feature space"""
+    n_features = getattr(model, "n_features_in_", None)
+    if n_features is not None and n_features != len(vocabulary):
+        raise BundleError(f"Model expects {n_features} features but the vocabulary has {len(vocabulary)}")
+    if metadata is not None and metadata.get("feature_count") != len(vocabulary):
+        raise BundleError("Vocabulary size does not match the recorded feature count")
+    if labels is not None and [str(c) for c in model.classes_] != labels:
+        raise BundleError("Model classes do not match the bundle's label list")
+
+
+def load_legacy(model_path=LEGACY_MODEL_PATH, mlb_path=LEGACY_MLB_PATH):
+    """Load the old two-pickle layout, validating that the pair matches"""
+    model = joblib.load(model_path)
+    mlb = joblib.load(mlb_path)
+    vocabulary = [str(c) for c in mlb.classes_]
+    validate(model, vocabulary)
+    metadata = {
+        "format": BUNDLE_FORMAT,
+        "version": getattr(model, "version_", 1),
+        "model_type": "legacy",
+        "feature_count": len(vocabulary),
+        "label_count": len(model.classes_),
+        "feedback_offset": getattr(model, "feedback_offset_", 0),
+    }
+    labels = [str(c) for c in model.classes_]
+    return ModelBundle(model, vocabulary, labels, advice_for_labels(labels), metadata)
+
+
+def load_model_bundle(path=BUNDLE_PATH):
+    """Load the bundle if present, otherwise the legacy pickle pair"""
+    if os.path.exists(path):
+        return load_bundle(path)
+    return load_legacy()
+
+
+def convert_legacy(path=BUNDLE_PATH):
+    """Write the legacy pickle pair out as a bundle, keeping its version and feedback offset.
+
+    Only Naive Bayes models become plain arrays; any other model is still
+    pickled inside the .npz, so it keeps pickle's load cost and guarantees.
+    """
+    legacy = load_legacy()
+    return save_bundle(
+        legacy.model,
+        legacy.vocabulary,
+        advice=legacy.advice,
+        path=path,
+        version=legacy.version,
+        extra={"feedback_offset": legacy.metadata["feedback_offset"]},
+    )
+
+
+if __name__ == "__main__":
+    metadata = convert_legacy()
+    print(f"{BUNDLE_PATH} written from the legacy pickles (model v{metadata['version']}, {metadata['model_type']})")
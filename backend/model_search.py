@@ -0,0 +1,154 @@
+import argparse
+import json
+import os
+import pickle
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import KFold, ParameterGrid, StratifiedKFold, cross_val_score
+from sklearn.naive_bayes import BernoulliNB, MultinomialNB
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.preprocessing import MultiLabelBinarizer
+
+from model import DATA_PATH, split_symptoms
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tracing import percentile
+
+# Model families and the hyperparameters searched for each
+CANDIDATES = {
+    "multinomial_nb": (MultinomialNB, {"alpha": [0.1, 0.5, 1.0]}),
+    "bernoulli_nb": (BernoulliNB, {"alpha": [0.1, 1.0]}),
+    "logistic_regression": (LogisticRegression, {"C": [0.1, 1.0, 10.0], "max_iter": [1000]}),
+    "random_forest": (RandomForestClassifier, {"n_estimators": [50, 200], "max_depth": [None, 20], "n_jobs": [1]}),
+    "knn": (KNeighborsClassifier, {"n_neighbors": [3, 5]}),
+}
+LATENCY_SAMPLES = 200
+LOAD_SAMPLES = 5
+
+_X = None
+_y = None
+
+
+def _init_worker(X, y):
+    global _X, _y
+    _X, _y = X, y
+
+
+def make_folds(y, folds):
+    """Stratified folds when every class has enough examples, plain shuffled folds otherwise"""
+    _, counts = np.unique(y, return_counts=True)
+    if counts.min() >= folds:
+        return StratifiedKFold(n_splits=folds, shuffle=True, random_state=0)
+    return KFold(n_splits=folds, shuffle=True, random_state=0)
+
+
+def evaluate(family, params, folds):
+    """Cross-validate one candidate and measure its serving costs"""
+    estimator_cls, _ = CANDIDATES[family]
+    model = estimator_cls(**params)
+    scores = cross_val_score(model, _X, _y, cv=make_folds(_y, folds), scoring="accuracy")
+
+    start = time.perf_counter()
+    model.fit(_X, _y)
+    fit_s = time.perf_counter() - start
+
+    # Single-row latency matches what /predict does per request
+    rows = _X[np.random.default_rng(0).integers(0, _X.shape[0], LATENCY_SAMPLES)]
+    latencies = []
+    for row in rows:
+        start = time.perf_counter()
+        model.predict(row.reshape(1, -1))
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+
+    blob = pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)
+    load_times = []
+    for _ in range(LOAD_SAMPLES):
+        start = time.perf_counter()
+        pickle.loads(blob)
+        load_times.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "family": family,
+        "params": params,
+        "accuracy": float(scores.mean()),
+        "accuracy_std": float(scores.std()),
+        "fit_s": fit_s,
+        "latency_p50_ms": statistics.median(latencies),
+        "latency_p99_ms": percentile(latencies, 0.99),
+        "size_kb": len(blob) / 1024,
+        "load_ms": statistics.median(load_times),
+    }
+
+
+def load_dataset(path):
+    df = pd.read_csv(path, usecols=["Symptoms", "Disease"]).dropna()
+    mlb = MultiLabelBinarizer()
+    X = mlb.fit_transform(split_symptoms(df["Symptoms"]))
+    return X, df["Disease"].astype(str).to_numpy()
+
+
+def rank(results, max_latency_ms=None, max_size_kb=None):
+    """Order candidates by accuracy, breaking ties on latency, after applying budgets"""
+    eligible = [
+        r for r in results
+        if (max_latency_ms is None or r["latency_p99_ms"] <= max_latency_ms)
+        and (max_size_kb is None or r["size_kb"] <= max_size_kb)
+    ]
+    return sorted(eligible, key=lambda r: (-round(r["accuracy"], 3), r["latency_p50_ms"], r["size_kb"]))
+
+
+def run_search(X, y, families, folds, workers):
+    jobs = [(family, params) for family in families for params in ParameterGrid(CANDIDATES[family][1])]
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(X, y)) as pool:
+        futures = {pool.submit(evaluate, family, params, folds): (family, params) for family, params in jobs}
+        for future in as_completed(futures):
+            family, params = futures[future]
+            try:
+                results.append(future.result())
+            except Exception as e:
+                print(f"{family} {params} failed: {e}")
+    return results
+
+
+def print_report(ranked):
+    header = f"{'#':>2}  {'model':<20} {'accuracy':>9} {'p50 ms':>8} {'p99 ms':>8} {'size KB':>9} {'load ms':>8}  params"
+    print(header)
+    print("-" * len(header))
+    for i, r in enumerate(ranked, 1):
+        print(f"{i:>2}  {r['family']:<20} {r['accuracy']:>9.3f} {r['latency_p50_ms']:>8.3f} {r['latency_p99_ms']:>8.3f} "
+              f"{r['size_kb']:>9.1f} {r['load_ms']:>8.2f}  {r['params']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cross-validated model comparison for /predict")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--families", nargs="+", choices=list(CANDIDATES), default=list(CANDIDATES))
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--max-latency-ms", type=float, help="Drop candidates with a slower p99")
+    parser.add_argument("--max-size-kb", type=float, help="Drop candidates with a larger pickle")
+    parser.add_argument("--output", default="model_search_report.json")
+    args = parser.parse_args()
+
+    X, y = load_dataset(args.data)
+    print(f"Dataset: {X.shape[0]} rows, {X.shape[1]} symptoms, {len(set(y))} diseases")
+    results = run_search(X, y, args.families, args.folds, args.workers)
+    ranked = rank(results, args.max_latency_ms, args.max_size_kb)
+    print_report(ranked)
+
+    with open(args.output, "w") as f:
+        json.dump({"ranked": ranked, "all": results}, f, indent=2)
+    print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from backend.knowledge_base import DEFAULT_ADVICE, get_knowledge_base
+from backend.model_bundle import BUNDLE_PATH, load_bundle, load_model_bundle
+from tracing import span
+
+RELOAD_CHECK_SECONDS = 5
+PREDICTION_CACHE_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE", 4096))
+# Worker processes for model.predict; 0 predicts in the request thread
+INFERENCE_WORKERS = int(os.environ.get("INFERENCE_WORKERS", 0))
+
+# Load model, encoder and advice from one validated bundle; a mismatched
+# model/vocabulary pair fails here at startup rather than on a request
+bundle = load_model_bundle()
+knowledge_base = get_knowledge_base()
+logging.info(f"Loaded model version {bundle.version} ({bundle.metadata['feature_count']} symptoms)")
+_model_mtime = os.path.getmtime(BUNDLE_PATH) if os.path.exists(BUNDLE_PATH) else None
+_last_reload_check = time.monotonic()
+_reload_lock = threading.Lock()
+# Symptom set -> (bundle, response). Replicas behind a consistent-hash router
+# each see a stable share of symptom sets, so this stays small and hot.
+_prediction_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_pool = None
+_pool_bundle = None  # bundle the pool (or the decision not to use one) belongs to
+_pool_lock = threading.Lock()
+
+
+def maybe_reload_model():
+    """Pick up a bundle published by update_model.py, checking at most every few seconds"""
+    global bundle, _model_mtime, _last_reload_check
+    now = time.monotonic()
+    if now - _last_reload_check < RELOAD_CHECK_SECONDS:
+        return
+    with _reload_lock:
+        if now - _last_reload_check < RELOAD_CHECK_SECONDS:
+            return
+        _last_reload_check = now
+        if not os.path.exists(BUNDLE_PATH):
+            return  # Still on the legacy pickles until a bundle is published
+        try:
+            mtime = os.path.getmtime(BUNDLE_PATH)
+            if mtime != _model_mtime:
+                bundle = load_bundle(BUNDLE_PATH)
+                _model_mtime = mtime
+                with _cache_lock:
+                    _prediction_cache.clear()
+                logging.info(f"Reloaded model version {bundle.version}")
+        except Exception as e:
+            logging.error(f"Model reload failed, keeping current model: {e}")
+
+
+def current_bundle():
+    """The bundle to use for a request, reloading first if a new one was published"""
+    maybe_reload_model()
+    return bundle
+
+
+def inference_pool(current):
+    """Worker pool serving this bundle, rebuilt after a reload; None if disabled or unsupported"""
+    global _pool, _pool_bundle
+    if not INFERENCE_WORKERS:
+        return None
+    if _pool_bundle is current:
+        return _pool
+    if current is not bundle:
+        # A request that started before a reload; don't rebuild the pool for it
+        return None
+    with _pool_lock:
+        if _pool_bundle is not current:
+            from backend.inference_pool import InferencePool, UnsupportedModelError
+            old = _pool
+            try:
+                _pool = InferencePool(current, INFERENCE_WORKERS)
+            except UnsupportedModelError as e:
+                logging.warning(f"{e}; predicting in-process")
+                _pool = None
+            _pool_bundle = current
+            if old is not None:
+                # Requests already on the old pool finish there; don't hold up this one
+                threading.Thread(target=old.close, name="inference-drain", daemon=True).start()
+        return _pool
+
+
+def shutdown():
+    """Stop inference workers, if any"""
+    global _pool, _pool_bundle
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+        _pool, _pool_bundle = None, None
+
+
+def _predict_labels(symptom_lists, current, **attrs):
+    """Labels for symptom lists, with encode and model.predict traced as separate stages"""
+    pool = inference_pool(current)
+    if pool is not None:
+        from backend.inference_pool import PoolClosedError
+        try:
+            # The workers encode and predict in one step
+            with span("model.predict", **attrs):
+                return pool.predict(symptom_lists)
+        except PoolClosedError:
+            pass  # Lost a race with a reload; this bundle's model is still in memory
+    with span("encode", **attrs):
+        input_matrix = current.mlb.transform(symptom_lists)
+    with span("model.predict", **attrs):
+        return current.model.predict(input_matrix)
+
+
+def model_version():
+    return current_bundle().version
+
+
+def format_prediction(prediction, entry, current):
+    """Response body for one prediction; advice comes from the knowledge base,
+    falling back to the snapshot stored with the model"""
+    return {
+        "disease": prediction,
+        "advice": entry["advice"] if entry else current.advice.get(prediction, DEFAULT_ADVICE),
+        "severity": entry.get("severity") if entry else None,
+        "model_version": current.version
+    }
+
+
+def predict_one(symptoms):
+    """Predict a disease for one list of English symptoms, memoized per symptom set"""
+    # Use one bundle throughout so a concurrent reload can't mix versions
+    current = current_bundle()
+    # Order and duplicates don't change the encoded vector
+    key = tuple(sorted(set(symptoms)))
+    with _cache_lock:
+        cached = _prediction_cache.get(key)
+        if cached is not None and cached[0] is current:
+            _prediction_cache.move_to_end(key)
+            return dict(cached[1])
+    result = _predict_uncached(symptoms, current)
+    with _cache_lock:
+        _prediction_cache[key] = (current, result)
+        if len(_prediction_cache) > PREDICTION_CACHE_SIZE:
+            _prediction_cache.popitem(last=False)
+    return dict(result)
+
+
+def _predict_uncached(symptoms, current):
+    prediction = _predict_labels([symptoms], current)[0]
+    with span("format"):
+        return format_prediction(prediction, knowledge_base.lookup(prediction), current)
+
+
+def predict_many(symptom_lists):
+    """Predict for many symptom lists with one encoder and model call"""
+    if not symptom_lists:
+        return []
+    current = current_bundle()
+    predictions = _predict_labels(symptom_lists, current, rows=len(symptom_lists))
+    with span("format"):
+        entries = knowledge_base.lookup_many(predictions)
+        return [format_prediction(p, e, current) for p, e in zip(predictions, entries)]
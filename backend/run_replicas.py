@@ -0,0 +1,85 @@
+"""Run several backend replicas locally, one single-worker uvicorn process each.
+
+Usage (from the repo root): python backend/run_replicas.py --replicas 4
+then start the frontends with the printed BACKEND_URLS so predictions are
+spread across the replicas by consistent hashing.
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STARTUP_TIMEOUT = 60
+
+
+def start_replica(host, port, cpu=None):
+    preexec = None
+    if cpu is not None and hasattr(os, "sched_setaffinity"):
+        # Pinning keeps replicas from competing for the same core
+        preexec = lambda: os.sched_setaffinity(0, {cpu})
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.app:app", "--host", host, "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, preexec_fn=preexec
+    )
+
+
+def wait_healthy(url, timeout=STARTUP_TIMEOUT):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url + "/", timeout=1):
+                return True
+        except OSError:
+            time.sleep(0.5)
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local pool of backend replicas")
+    parser.add_argument("--replicas", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--base-port", type=int, default=8000)
+    parser.add_argument("--pin", action="store_true", help="Pin each replica to its own CPU (Linux)")
+    args = parser.parse_args()
+
+    cpus = sorted(os.sched_getaffinity(0)) if args.pin and hasattr(os, "sched_getaffinity") else None
+    replicas = {}
+    pinned = {}  # url -> cpu, kept so a restarted replica stays on its core
+    for i in range(args.replicas):
+        port = args.base_port + i
+        url = f"http://{args.host}:{port}"
+        pinned[url] = cpus[i % len(cpus)] if cpus else None
+        replicas[url] = start_replica(args.host, port, pinned[url])
+
+    try:
+        for url in replicas:
+            if not wait_healthy(url):
+                raise SystemExit(f"Replica {url} did not become healthy")
+        print(f"{len(replicas)} replicas running. Point the frontends at them with:")
+        print(f"  export BACKEND_URLS={','.join(replicas)}")
+        while True:
+            time.sleep(1)
+            for url, proc in replicas.items():
+                if proc.poll() is not None:
+                    print(f"Replica {url} exited with code {proc.returncode}", file=sys.stderr)
+                    port = int(url.rsplit(":", 1)[1])
+                    replicas[url] = start_replica(args.host, port, pinned[url])
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for proc in replicas.values():
+            if proc.poll() is None:
+                proc.send_signal(signal.SIGINT)
+        for proc in replicas.values():
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
-import joblib
 from sklearn.naive_bayes import MultinomialNB
 from sklearn.preprocessing import MultiLabelBinarizer
-import os
+
+from model_bundle import BUNDLE_PATH, hash_training_data, save_bundle
 
 # Sample training data
 X = [
@@ -34,13 +34,6 @@ X_encoded = mlb.fit_transform(X)
 model = MultinomialNB()
 model.fit(X_encoded, y)
 
-# Ensure output path exists
-os.makedirs("backend", exist_ok=True)
-
-# Save model and encoder
-joblib.dump(model, "backend/symptom_model.pkl")
-joblib.dump(mlb, "backend/mlb.pkl")
-
-
-
-
+# Save model, vocabulary and an advice snapshot as one bundle
+save_bundle(model, mlb.classes_, training_data_hash=hash_training_data(X, y))
+print(f"Model bundle written to {BUNDLE_PATH}")
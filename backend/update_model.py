@@ -0,0 +1,120 @@
+import argparse
+import json
+import logging
+import os
+import time
+import warnings
+
+import numpy as np
+
+from model_bundle import BUNDLE_PATH, load_model_bundle, save_bundle
+
+logging.basicConfig(level=logging.INFO)
+
+FEEDBACK_LOG = "backend/feedback.jsonl"
+BATCH_SIZE = 1000
+
+
+def read_new_cases(log_path, offset):
+    """Read complete feedback lines after a byte offset.
+
+    Returns (cases, new_offset); a partially written last line is left for
+    the next run.
+    """
+    cases = []
+    if not os.path.exists(log_path):
+        return cases, offset
+    with open(log_path, "rb") as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            offset += len(line)
+            try:
+                case = json.loads(line)
+            except json.JSONDecodeError:
+                logging.warning(f"Skipping malformed feedback line: {line[:80]!r}")
+                continue
+            if case.get("symptoms") and case.get("disease"):
+                cases.append(case)
+    return cases, offset
+
+
+def add_classes(model, labels):
+    """Grow a fitted naive Bayes model's class arrays to include new labels.
+
+    classes_ must stay sorted because partial_fit binarizes targets against
+    it, so each new class is inserted in order with zero counts.
+    """
+    new_labels = sorted(set(labels) - set(model.classes_))
+    for label in new_labels:
+        i = int(np.searchsorted(model.classes_, label))
+        model.classes_ = np.insert(model.classes_, i, label)
+        model.class_count_ = np.insert(model.class_count_, i, 0.0)
+        model.feature_count_ = np.insert(model.feature_count_, i, 0.0, axis=0)
+        if hasattr(model, "class_log_prior_"):
+            model.class_log_prior_ = np.insert(model.class_log_prior_, i, 0.0)
+        if hasattr(model, "feature_log_prob_"):
+            model.feature_log_prob_ = np.insert(model.feature_log_prob_, i, 0.0, axis=0)
+    return new_labels
+
+
+def apply_cases(model, mlb, cases, batch_size=BATCH_SIZE):
+    """Update model counts in place with labeled cases, in mini-batches"""
+    if not hasattr(model, "partial_fit") or not hasattr(model, "feature_count_"):
+        raise TypeError(f"{type(model).__name__} does not support incremental count updates; retrain instead")
+    new_labels = add_classes(model, [case["disease"] for case in cases])
+    with warnings.catch_warnings():
+        # Symptoms outside the vocabulary are ignored by the encoder
+        warnings.simplefilter("ignore", UserWarning)
+        for start in range(0, len(cases), batch_size):
+            batch = cases[start:start + batch_size]
+            X = mlb.transform([[s.strip() for s in case["symptoms"]] for case in batch])
+            y = [case["disease"] for case in batch]
+            model.partial_fit(X, y)
+    return new_labels
+
+
+def run_once(batch_size=BATCH_SIZE):
+    """Apply any feedback not yet trained on and publish a new bundle version"""
+    bundle = load_model_bundle()
+
+    # The offset travels inside the bundle, so a published model and the
+    # data it has seen can never get out of step
+    offset = bundle.metadata.get("feedback_offset", 0)
+    cases, new_offset = read_new_cases(FEEDBACK_LOG, offset)
+    if not cases:
+        logging.info("No new feedback to apply")
+        return None
+
+    start = time.perf_counter()
+    new_labels = apply_cases(bundle.model, bundle.mlb, cases, batch_size)
+    metadata = save_bundle(
+        bundle.model,
+        bundle.vocabulary,
+        path=BUNDLE_PATH,
+        training_data_hash=bundle.metadata.get("training_data_sha256"),
+        version=bundle.version + 1,
+        extra={"feedback_offset": new_offset}
+    )
+    logging.info(f"Published model v{metadata['version']} from {len(cases)} cases "
+                 f"({len(new_labels)} new diseases) in {time.perf_counter() - start:.2f}s")
+    return metadata
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally update the model from clinician feedback")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--interval", type=float, default=0,
+                        help="Keep running, polling for feedback every N seconds")
+    args = parser.parse_args()
+
+    while True:
+        run_once(args.batch_size)
+        if not args.interval:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
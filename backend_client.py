@@ -0,0 +1,356 @@
+import asyncio
+import bisect
+import hashlib
+import logging
+import os
+import random
+import statistics
+import threading
+import time
+
+import httpx
+
+from tracing import request_headers, span
+
+BACKEND_URL = os.environ.get("BACKEND_URL", "http://127.0.0.1:8000")
+CONNECT_TIMEOUT = float(os.environ.get("BACKEND_CONNECT_TIMEOUT", 2.0))
+READ_TIMEOUT = float(os.environ.get("BACKEND_READ_TIMEOUT", 10.0))
+MAX_RETRIES = int(os.environ.get("BACKEND_MAX_RETRIES", 2))
+BACKOFF_BASE = 0.1
+BACKOFF_MAX = 2.0
+MAX_CONNECTIONS = int(os.environ.get("BACKEND_MAX_CONNECTIONS", 20))
+# Comma-separated replica URLs; predictions are routed by consistent hashing
+BACKEND_URLS = [u.strip() for u in os.environ.get("BACKEND_URLS", BACKEND_URL).split(",") if u.strip()]
+HEALTH_INTERVAL = float(os.environ.get("BACKEND_HEALTH_INTERVAL", 5.0))
+EJECT_SECONDS = float(os.environ.get("BACKEND_EJECT_SECONDS", 30.0))
+SLOW_MS = float(os.environ.get("BACKEND_SLOW_MS", 1000.0))
+SLOW_FACTOR = 3.0
+RING_REPLICAS = 100
+
+RETRYABLE_STATUS = {502, 503, 504}
+
+
+class BackendError(Exception):
+    """Raised when the prediction backend cannot produce a result"""
+
+
+class CircuitOpenError(BackendError):
+    """Raised without contacting the backend while the circuit is open"""
+
+
+class BackendStatusError(BackendError):
+    """Raised for an HTTP error status that retrying won't fix"""
+
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures and lets one trial call through after a cool-down"""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+def backoff_delay(attempt):
+    """Exponential backoff with full jitter"""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+def _timeout(connect, read):
+    return httpx.Timeout(read, connect=connect)
+
+
+def _limits(max_connections):
+    return httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+
+
+def _parse_prediction(response):
+    result = response.json()
+    if "error" in result:
+        raise BackendError(result["error"])
+    return result
+
+
+class BackendClient:
+    """Pooled keep-alive client for the prediction backend"""
+
+    def __init__(self, base_url=BACKEND_URL, connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT,
+                 max_retries=MAX_RETRIES, max_connections=MAX_CONNECTIONS, breaker=None):
+        self.base_url = base_url.rstrip("/")
+        self.max_retries = max_retries
+        self.breaker = breaker or CircuitBreaker()
+        self._client = httpx.Client(base_url=self.base_url, timeout=_timeout(connect_timeout, read_timeout),
+                                    limits=_limits(max_connections))
+
+    def request(self, method, path, **kwargs):
+        """Send a request with bounded retries, raising BackendError on failure"""
+        kwargs["headers"] = {**request_headers(), **kwargs.get("headers", {})}
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow():
+                raise CircuitOpenError(f"Backend at {self.base_url} is unavailable (circuit open)")
+            try:
+                response = self._client.request(method, path, **kwargs)
+                if response.status_code in RETRYABLE_STATUS:
+                    raise httpx.HTTPStatusError(f"{response.status_code} from backend", request=response.request, response=response)
+                response.raise_for_status()
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                retryable = isinstance(e, httpx.TransportError) or e.response.status_code in RETRYABLE_STATUS
+                if not retryable:
+                    self.breaker.record_success()
+                    raise BackendStatusError(str(e), e.response.status_code) from e
+                self.breaker.record_failure()
+                last_error = e
+                if attempt < self.max_retries:
+                    time.sleep(backoff_delay(attempt))
+                continue
+            self.breaker.record_success()
+            return response
+        raise BackendError(f"Backend request failed after {self.max_retries + 1} attempts: {last_error}") from last_error
+
+    def predict(self, symptoms):
+        """Predict a disease from a list of English symptom strings"""
+        with span("backend.predict"):
+            return _parse_prediction(self.request("POST", "/predict", json={"symptoms": symptoms}))
+
+    def close(self):
+        self._client.close()
+
+
+class AsyncBackendClient:
+    """Async variant of BackendClient for use inside event loops"""
+
+    def __init__(self, base_url=BACKEND_URL, connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT,
+                 max_retries=MAX_RETRIES, max_connections=MAX_CONNECTIONS, breaker=None):
+        self.base_url = base_url.rstrip("/")
+        self.max_retries = max_retries
+        self.breaker = breaker or CircuitBreaker()
+        self._client = httpx.AsyncClient(base_url=self.base_url, timeout=_timeout(connect_timeout, read_timeout),
+                                         limits=_limits(max_connections))
+
+    async def request(self, method, path, **kwargs):
+        """Send a request with bounded retries, raising BackendError on failure"""
+        kwargs["headers"] = {**request_headers(), **kwargs.get("headers", {})}
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow():
+                raise CircuitOpenError(f"Backend at {self.base_url} is unavailable (circuit open)")
+            try:
+                response = await self._client.request(method, path, **kwargs)
+                if response.status_code in RETRYABLE_STATUS:
+                    raise httpx.HTTPStatusError(f"{response.status_code} from backend", request=response.request, response=response)
+                response.raise_for_status()
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                retryable = isinstance(e, httpx.TransportError) or e.response.status_code in RETRYABLE_STATUS
+                if not retryable:
+                    self.breaker.record_success()
+                    raise BackendStatusError(str(e), e.response.status_code) from e
+                self.breaker.record_failure()
+                last_error = e
+                if attempt < self.max_retries:
+                    await asyncio.sleep(backoff_delay(attempt))
+                continue
+            self.breaker.record_success()
+            return response
+        raise BackendError(f"Backend request failed after {self.max_retries + 1} attempts: {last_error}") from last_error
+
+    async def predict(self, symptoms):
+        """Predict a disease from a list of English symptom strings"""
+        with span("backend.predict"):
+            return _parse_prediction(await self.request("POST", "/predict", json={"symptoms": symptoms}))
+
+    async def aclose(self):
+        await self._client.aclose()
+
+
+def canonical_symptoms(symptoms):
+    """Routing key for a symptom list: order, case and duplicates don't matter"""
+    return "|".join(sorted({s.strip().lower() for s in symptoms if s.strip()}))
+
+
+def _ring_hash(value):
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent-hash ring; adding or removing a node only remaps its own share of keys"""
+
+    def __init__(self, nodes, replicas=RING_REPLICAS):
+        self.nodes = list(nodes)
+        points = sorted((_ring_hash(f"{node}#{i}"), node) for node in self.nodes for i in range(replicas))
+        self._hashes = [h for h, _ in points]
+        self._owners = [node for _, node in points]
+
+    def nodes_for(self, key):
+        """Every node in ring order starting at the key's owner, for failover"""
+        if not self.nodes:
+            return []
+        start = bisect.bisect(self._hashes, _ring_hash(key))
+        seen = []
+        for i in range(len(self._owners)):
+            node = self._owners[(start + i) % len(self._owners)]
+            if node not in seen:
+                seen.append(node)
+                if len(seen) == len(self.nodes):
+                    break
+        return seen
+
+
+class _Replica:
+    def __init__(self, client):
+        self.client = client
+        self.latency_ms = None  # exponentially weighted moving average
+        self.ejected_until = 0.0
+
+    @property
+    def available(self):
+        return time.monotonic() >= self.ejected_until and self.client.breaker.state != "open"
+
+    def record_latency(self, elapsed_ms):
+        self.latency_ms = elapsed_ms if self.latency_ms is None else 0.8 * self.latency_ms + 0.2 * elapsed_ms
+
+
+class BackendPool:
+    """Routes predictions across backend replicas by consistent hash of the symptom set.
+
+    The same symptoms always go to the same replica while it is healthy, so
+    each replica's prediction cache only holds its share of the keys.
+    Failing or persistently slow replicas are ejected for a while and their
+    keys fail over to the next replica on the ring.
+    """
+
+    def __init__(self, urls=None, health_interval=HEALTH_INTERVAL, **client_kwargs):
+        urls = [u.rstrip("/") for u in (urls or BACKEND_URLS)]
+        # Failover to another replica replaces retrying the same one
+        client_kwargs.setdefault("max_retries", 0)
+        self.replicas = {url: _Replica(BackendClient(url, **client_kwargs)) for url in urls}
+        self.ring = HashRing(urls)
+        self._lock = threading.Lock()
+        if health_interval:
+            threading.Thread(target=self._health_loop, args=(health_interval,), name="backend-health", daemon=True).start()
+
+    def eject(self, url, reason):
+        with self._lock:
+            replica = self.replicas[url]
+            replica.ejected_until = time.monotonic() + EJECT_SECONDS
+            # It is readmitted when the ejection lapses, judged on fresh latencies
+            replica.latency_ms = None
+        logging.warning(f"Ejecting backend {url} for {EJECT_SECONDS:.0f}s: {reason}")
+
+    def _is_slow(self, url):
+        latencies = [r.latency_ms for r in self.replicas.values() if r.latency_ms is not None]
+        latency = self.replicas[url].latency_ms
+        if latency is None or latency < SLOW_MS:
+            return False
+        # With peers to compare against, only eject outliers; a uniformly slow pool is load, not a bad node
+        return len(latencies) < 2 or latency > SLOW_FACTOR * statistics.median(latencies)
+
+    def request(self, method, path, key=None, **kwargs):
+        """Send a request to the key's replica, failing over along the ring"""
+        key = key if key is not None else str(random.random())
+        candidates = self.ring.nodes_for(key)
+        # If everything is ejected, trying anyway beats failing outright
+        ordered = [u for u in candidates if self.replicas[u].available] or candidates
+        last_error = None
+        for url in ordered:
+            replica = self.replicas[url]
+            start = time.perf_counter()
+            try:
+                response = replica.client.request(method, path, **kwargs)
+            except BackendStatusError as e:
+                if e.status_code < 500:
+                    # A bad request fails the same way everywhere; don't take replicas out for it
+                    raise
+                last_error = e
+                self.eject(url, e)
+                continue
+            except BackendError as e:
+                # Transport errors, retryable statuses and open circuits
+                last_error = e
+                self.eject(url, e)
+                continue
+            replica.record_latency((time.perf_counter() - start) * 1000)
+            if self._is_slow(url):
+                self.eject(url, f"average latency {replica.latency_ms:.0f}ms")
+            return response
+        raise BackendError(f"All {len(candidates)} backend replicas failed: {last_error}") from last_error
+
+    def predict(self, symptoms):
+        """Predict a disease from a list of English symptom strings"""
+        with span("backend.predict"):
+            response = self.request("POST", "/predict", key=canonical_symptoms(symptoms), json={"symptoms": symptoms})
+            return _parse_prediction(response)
+
+    def _health_loop(self, interval):
+        while True:
+            time.sleep(interval)
+            for url, replica in self.replicas.items():
+                try:
+                    replica.client._client.get("/", timeout=CONNECT_TIMEOUT).raise_for_status()
+                except httpx.HTTPError as e:
+                    if time.monotonic() >= replica.ejected_until:
+                        self.eject(url, f"health check failed: {e}")
+
+    def status(self):
+        """Per-replica availability and average latency"""
+        return {url: {"available": r.available, "latency_ms": r.latency_ms} for url, r in self.replicas.items()}
+
+    def close(self):
+        for replica in self.replicas.values():
+            replica.client.close()
+
+
+_shared_client = None
+_shared_lock = threading.Lock()
+
+
+def get_backend_client():
+    """Process-wide client, so every caller reuses the same connection pools.
+
+    A BackendPool when BACKEND_URLS lists several replicas, otherwise a
+    BackendClient for the single backend.
+    """
+    global _shared_client
+    if _shared_client is None:
+        with _shared_lock:
+            if _shared_client is None:
+                _shared_client = BackendPool() if len(BACKEND_URLS) > 1 else BackendClient(BACKEND_URLS[0])
+    return _shared_client
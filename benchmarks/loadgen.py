@@ -0,0 +1,192 @@
+"""Open-loop load generator for the prediction backend.
+
+Requests are sent on a fixed schedule regardless of how fast earlier ones
+complete, and latency is measured from each request's intended send time,
+so a backend stall shows up in the percentiles instead of silently
+lowering the offered rate (coordinated omission).
+
+Usage: python benchmarks/loadgen.py --qps 200 --duration 60 --source flags
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SYNTHETIC_SYMPTOMS = [
+    "fever", "cough", "headache", "fatigue", "nausea", "sore throat", "runny nose", "sneezing",
+    "body ache", "chills", "vomiting", "diarrhea", "abdominal pain", "chest pain",
+    "shortness of breath", "dizziness", "rash", "joint pain", "muscle pain", "high fever",
+]
+
+
+def parse_symptoms(text):
+    return [s.strip().lower() for s in str(text).split(",") if s.strip()]
+
+
+def recorded_mixes(flagging_dir):
+    """Symptom lists from flagged Gradio sessions (CSV and JSON-lines)"""
+    sys.path.insert(0, ROOT)
+    from flagging import iter_flags
+    mixes = [parse_symptoms(symptoms) for symptoms, _ in iter_flags(flagging_dir)]
+    return [mix for mix in mixes if mix]
+
+
+def synthetic_mix(rng):
+    """A few symptoms, skewed towards the common ones the way real input is"""
+    count = min(1 + int(rng.expovariate(0.6)), 6)
+    weights = [1 / (rank + 1) for rank in range(len(SYNTHETIC_SYMPTOMS))]
+    return sorted(set(rng.choices(SYNTHETIC_SYMPTOMS, weights=weights, k=count)))
+
+
+def build_workload(count, mixes=None, batch_fraction=0.1, batch_size=20, conditions_fraction=0.05, seed=0):
+    """List of (endpoint, method, payload) requests drawn from recorded or synthetic mixes"""
+    rng = random.Random(seed)
+
+    def mix():
+        return rng.choice(mixes) if mixes else synthetic_mix(rng)
+
+    workload = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < conditions_fraction:
+            workload.append(("/conditions", "GET", None))
+        elif roll < conditions_fraction + batch_fraction:
+            workload.append(("/predict/batch", "POST", {"requests": [mix() for _ in range(batch_size)]}))
+        else:
+            workload.append(("/predict", "POST", {"symptoms": mix()}))
+    return workload
+
+
+def send_times(count, qps, poisson, seed=0):
+    """Intended send offsets in seconds: evenly spaced, or Poisson arrivals"""
+    if not poisson:
+        return [i / qps for i in range(count)]
+    rng = random.Random(seed)
+    offsets, t = [], 0.0
+    for _ in range(count):
+        offsets.append(t)
+        t += rng.expovariate(qps)
+    return offsets
+
+
+async def _send(client, url, request, intended, results):
+    endpoint, method, payload = request
+    try:
+        response = await client.request(method, url + endpoint, json=payload)
+        body = response.json()
+        # The backend reports prediction failures as 200 {"error": ...}
+        ok = response.status_code < 400 and not (isinstance(body, dict) and "error" in body)
+    except (httpx.HTTPError, ValueError):
+        ok = False
+    results[endpoint].append((time.perf_counter() - intended, ok))
+
+
+def route(workload, urls):
+    """Replica URL for each request: predictions by consistent hash of the
+    symptom set, as BackendPool routes them, everything else round-robin"""
+    if len(urls) == 1:
+        return urls * len(workload)
+    sys.path.insert(0, ROOT)
+    from backend_client import HashRing, canonical_symptoms
+    ring = HashRing(urls)
+    routed = []
+    for i, (endpoint, _, payload) in enumerate(workload):
+        if endpoint == "/predict":
+            routed.append(ring.nodes_for(canonical_symptoms(payload["symptoms"]))[0])
+        else:
+            routed.append(urls[i % len(urls)])
+    return routed
+
+
+async def run_load(urls, workload, offsets, timeout=10.0, max_connections=1000):
+    """Fire every request at its scheduled time and collect (latency, ok) per endpoint"""
+    results = defaultdict(list)
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+    targets = route(workload, urls)
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        tasks = []
+        max_lag = 0.0
+        start = time.perf_counter()
+        for (endpoint, method, payload), url, offset in zip(workload, targets, offsets):
+            intended = start + offset
+            delay = intended - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                max_lag = max(max_lag, -delay)
+            request = (endpoint, method, payload)
+            tasks.append(asyncio.create_task(_send(client, url, request, intended, results)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+    return results, elapsed, max_lag
+
+
+def summarize(results, elapsed):
+    """Per-endpoint throughput, latency percentiles (ms) and error rate"""
+    sys.path.insert(0, ROOT)
+    from tracing import percentile
+
+    report = {}
+    for endpoint, samples in sorted(results.items()):
+        latencies = sorted(latency * 1000 for latency, _ in samples)
+        errors = sum(1 for _, ok in samples if not ok)
+        report[endpoint] = {
+            "requests": len(samples),
+            "throughput_rps": len(samples) / elapsed if elapsed else 0.0,
+            "error_rate": errors / len(samples),
+            "p50_ms": percentile(latencies, 0.50),
+            "p99_ms": percentile(latencies, 0.99),
+            "p999_ms": percentile(latencies, 0.999),
+            "max_ms": latencies[-1],
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Open-loop load test for backend/app.py")
+    parser.add_argument("--url", default=os.environ.get("BACKEND_URLS", os.environ.get("BACKEND_URL", "http://127.0.0.1:8000")),
+                        help="Backend URL, or comma-separated replica URLs")
+    parser.add_argument("--qps", type=float, default=50.0, help="Offered request rate")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of load to offer")
+    parser.add_argument("--source", choices=["flags", "synthetic"], default="synthetic")
+    parser.add_argument("--flag-dir", default=os.path.join(ROOT, ".gradio", "flagged"))
+    parser.add_argument("--poisson", action="store_true", help="Poisson arrivals instead of a fixed interval")
+    parser.add_argument("--batch-fraction", type=float, default=0.1)
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--conditions-fraction", type=float, default=0.05)
+    parser.add_argument("--timeout", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the report as JSON")
+    args = parser.parse_args()
+
+    urls = [u.strip().rstrip("/") for u in args.url.split(",") if u.strip()]
+    mixes = recorded_mixes(args.flag_dir) if args.source == "flags" else None
+    if args.source == "flags" and not mixes:
+        parser.error(f"No flagged symptoms found in {args.flag_dir}")
+    count = int(args.qps * args.duration)
+    workload = build_workload(count, mixes, args.batch_fraction, args.batch_size, args.conditions_fraction, args.seed)
+    offsets = send_times(count, args.qps, args.poisson, args.seed)
+
+    results, elapsed, max_lag = asyncio.run(run_load(urls, workload, offsets, args.timeout))
+    report = {
+        "offered_qps": args.qps,
+        "duration_s": elapsed,
+        "max_send_lag_ms": max_lag * 1000,  # if large, the generator itself couldn't keep up
+        "endpoints": summarize(results, elapsed),
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
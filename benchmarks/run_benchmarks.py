@@ -0,0 +1,286 @@
+"""Offline benchmarks for the predict and translate pipelines.
+
+Usage: python benchmarks/run_benchmarks.py [--baseline bench_output.json]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import stand_ins
+
+stand_ins.install()
+
+from tracing import percentile
+
+SAMPLE_SYMPTOMS = [
+    ["fever"], ["cough"], ["headache"],
+    ["fever", "cough"], ["headache", "fatigue", "nausea"],
+    ["sneezing", "cough", "runny nose"], ["chest pain", "shortness of breath", "fatigue"],
+    ["abdominal pain", "diarrhea", "nausea"], ["rash", "high fever", "joint pain", "muscle pain"],
+]
+SAMPLE_TEXTS = [
+    "I have had a fever and a dry cough for three days.",
+    "Severe headache with nausea and sensitivity to light.",
+    "Chest pain and shortness of breath when climbing stairs.",
+    "Stomach cramps, diarrhea and vomiting after dinner.",
+]
+STORE_SIZES = [100, 1000, 10000, 100000]
+REGRESSION_KEYS = ("p50_ms", "p99_ms", "mean_ms", "cumulative_ms")
+# Modules the frontend and chatbot load at startup or on first use
+IMPORT_TARGETS = [
+    "streamlit", "tracing", "backend_client", "deep_translator", "pandas",
+    "backend.knowledge_base", "backend.predictor", "symptom_extractor", "chatbot", "chatbot_ui",
+]
+
+
+def measure(fn, repeat=200, warmup=10):
+    """Run fn repeatedly and return latency percentiles in milliseconds"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "n": repeat,
+        "mean_ms": statistics.fmean(samples),
+        "p50_ms": percentile(samples, 0.50),
+        "p90_ms": percentile(samples, 0.90),
+        "p99_ms": percentile(samples, 0.99),
+        "max_ms": samples[-1],
+    }
+
+
+def bench_predict_api(repeat):
+    from fastapi.testclient import TestClient
+    from backend.app import app
+
+    client = TestClient(app)
+    rng = random.Random(0)
+    results = {"single": measure(lambda: client.post("/predict", json={"symptoms": rng.choice(SAMPLE_SYMPTOMS)}), repeat)}
+    for size in (10, 100):
+        batch = [rng.choice(SAMPLE_SYMPTOMS) for _ in range(size)]
+        stats = measure(lambda: client.post("/predict/batch", json={"requests": batch}), max(repeat // 4, 10))
+        stats["per_item_ms"] = stats["p50_ms"] / size
+        results[f"batch_{size}"] = stats
+    return results
+
+
+def bench_model(repeat):
+    from backend.predictor import current_bundle
+
+    bundle = current_bundle()
+    rng = random.Random(0)
+    vector = bundle.mlb.transform([SAMPLE_SYMPTOMS[4]])
+    batch = [rng.choice(SAMPLE_SYMPTOMS) for _ in range(100)]
+    matrix = bundle.mlb.transform(batch)
+    return {
+        "encode_single": measure(lambda: bundle.mlb.transform([SAMPLE_SYMPTOMS[4]]), repeat),
+        "predict_single": measure(lambda: bundle.model.predict(vector), repeat),
+        "encode_batch_100": measure(lambda: bundle.mlb.transform(batch), repeat // 4),
+        "predict_batch_100": measure(lambda: bundle.model.predict(matrix), repeat // 4),
+    }
+
+
+def bench_pipeline(repeat):
+    """chatbot_ui.get_prediction end to end, with stand-in translation"""
+    try:
+        import chatbot_ui
+    except Exception as e:
+        return {"skipped": f"chatbot UI unavailable: {e}"}
+    return {
+        "english": measure(lambda: chatbot_ui.get_prediction("fever, cough", "en"), repeat),
+        "translated": measure(lambda: chatbot_ui.get_prediction("fever, cough", "ta"), repeat),
+    }
+
+
+def bench_translation(repeat):
+    """Translation client overhead: cache hits, misses and coalesced concurrent calls"""
+    import threading
+    import translate
+
+    counter = iter(range(10 ** 9))
+    results = {
+        "cache_hit": measure(lambda: translate.translate("fever, cough", "en", "ta"), repeat),
+        "miss": measure(lambda: translate.translate(f"symptom {next(counter)}", "en", "ta"), repeat),
+        "batch_20_miss": measure(
+            lambda: translate.translate_batch([f"label {next(counter)}" for _ in range(20)], "en", "ta"), repeat // 4),
+    }
+
+    def burst():
+        text = f"burst {next(counter)}"
+        threads = [threading.Thread(target=translate.translate, args=(text, "en", "ta")) for _ in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    results["16_concurrent_identical"] = measure(burst, max(repeat // 10, 5))
+    results["stats"] = translate.get_translation_stats()
+    return results
+
+
+def bench_extraction(repeat):
+    try:
+        from symptom_extractor import extract_symptoms
+        extract_symptoms(SAMPLE_TEXTS[0])
+    except Exception as e:
+        return {"skipped": f"symptom extractor unavailable: {e}"}
+    stats = measure(lambda: [extract_symptoms(t) for t in SAMPLE_TEXTS], max(repeat // 10, 5), warmup=1)
+    stats["texts_per_second"] = len(SAMPLE_TEXTS) / (stats["mean_ms"] / 1000)
+    return stats
+
+
+def bench_agent(repeat):
+    try:
+        from chatbot import ask_bot
+    except Exception as e:
+        return {"skipped": f"agent unavailable: {e}"}
+    return measure(lambda: ask_bot("fever, cough", session_id="bench"), max(repeat // 10, 5), warmup=1)
+
+
+def _appointments(count):
+    rng = random.Random(0)
+    data = {}
+    for i in range(count):
+        data.setdefault(f"user{i % max(count // 10, 1)}", []).append({
+            "id": str(i), "doctor_id": f"dr_{i % 20}", "date": f"2026-{1 + i % 12:02d}-{1 + i % 28:02d}",
+            "time": rng.choice(["09:00 AM", "02:00 PM"]), "reason": "checkup",
+            "status": rng.choice(["Scheduled", "Cancelled"]), "created_at": "2026-01-01 00:00:00",
+        })
+    return data
+
+
+def bench_json_stores():
+    """Appointment store cost as the JSON file grows"""
+    from appointment_store import AppointmentStore
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in STORE_SIZES:
+            path = os.path.join(tmp, f"appointments_{size}.json")
+            data = _appointments(size)
+            start = time.perf_counter()
+            with open(path, "w") as f:
+                json.dump(data, f)
+            write_ms = (time.perf_counter() - start) * 1000
+
+            store = AppointmentStore(path)
+            start = time.perf_counter()
+            store.all()
+            load_ms = (time.perf_counter() - start) * 1000
+            results[str(size)] = {
+                "file_kb": os.path.getsize(path) / 1024,
+                "full_write_ms": write_ms,
+                "cold_load_and_index_ms": load_ms,
+                "doctor_schedule": measure(lambda: store.doctor_schedule("dr_3", "2026-04-04"), 50),
+                "add_appointment": measure(lambda: store.add("bench", "dr_1", "2026-05-05", "09:00 AM", "x"), 5, warmup=0),
+            }
+    return results
+
+
+def import_time(module):
+    """Cumulative and heaviest self import times (ms) of a module in a fresh interpreter"""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(
+        [stand_ins.ROOT, os.path.join(stand_ins.ROOT, "frontend"), os.path.join(stand_ins.ROOT, "chatbot")]))
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True, env=env, cwd=stand_ins.ROOT)
+    if proc.returncode != 0:
+        return {"skipped": proc.stderr.strip().splitlines()[-1]}
+    rows = []
+    for line in proc.stderr.splitlines():
+        # "import time:   self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us) / 1000, int(cumulative_us) / 1000))
+    target = next((row for row in rows if row[0] == module), rows[-1])
+    heaviest = sorted(rows, key=lambda row: row[1], reverse=True)[:10]
+    return {
+        "cumulative_ms": target[2],
+        "modules_loaded": len(rows),
+        "heaviest_self_ms": {name: self_ms for name, self_ms, _ in heaviest},
+    }
+
+
+def bench_imports():
+    return {module: import_time(module) for module in IMPORT_TARGETS}
+
+
+def compare(results, baseline, threshold):
+    """List metrics that regressed by more than threshold (a fraction) against a baseline run"""
+    regressions = []
+
+    def walk(current, previous, path):
+        for key, value in current.items():
+            if key not in previous:
+                continue
+            if isinstance(value, dict) and isinstance(previous[key], dict):
+                walk(value, previous[key], f"{path}.{key}" if path else key)
+            elif key in REGRESSION_KEYS and previous[key] and value > previous[key] * (1 + threshold):
+                regressions.append({"metric": f"{path}.{key}", "baseline": previous[key], "current": value,
+                                    "change": value / previous[key] - 1})
+
+    walk(results, baseline, "")
+    return regressions
+
+
+BENCHMARKS = {
+    "predict_api": bench_predict_api,
+    "model": bench_model,
+    "pipeline": bench_pipeline,
+    "translation": bench_translation,
+    "extraction": bench_extraction,
+    "agent": bench_agent,
+    "json_stores": lambda repeat: bench_json_stores(),
+    "imports": lambda repeat: bench_imports(),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the predict and translate pipelines")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="Run a subset of benchmarks")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--output", default="bench_output.json")
+    parser.add_argument("--baseline", help="Earlier output to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown before flagging, e.g. 0.2 = 20%%")
+    args = parser.parse_args()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+        },
+        "results": {},
+    }
+    for name in args.only or BENCHMARKS:
+        print(f"Running {name}...", file=sys.stderr)
+        try:
+            report["results"][name] = BENCHMARKS[name](args.repeat)
+        except ImportError as e:
+            report["results"][name] = {"skipped": f"missing dependency: {e}"}
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            report["regressions"] = compare(report["results"], json.load(f)["results"], args.threshold)
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+    if report.get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
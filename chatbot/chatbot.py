@@ -1,11 +1,112 @@
-from langchain.agents import initialize_agent, Tool
-from langchain.llms import HuggingFaceHub
-from tools import symptom_checker
+import logging
+import queue
+import threading
+import time
 
-llm = HuggingFaceHub(repo_id="microsoft/phi-2", model_kwargs={"temperature": 0.7, "max_length": 100})
+from langchain.callbacks.base import BaseCallbackHandler
+from tools import count_tool_calls, get_tool_stats, symptom_checker
 
-tools = [Tool(name="Symptom Checker", func=symptom_checker, description="Check illness based on symptoms.")]
-agent = initialize_agent(tools, llm, agent="zero-shot-react-description", verbose=True)
+_sessions = None
+_sessions_lock = threading.Lock()
 
-def ask_bot(message):
-    return agent.run(message)
+turn_stats = {"turns": 0, "total_seconds": 0.0, "tool_calls": 0, "tool_cache_hits": 0}
+_stats_lock = threading.Lock()
+
+def get_sessions():
+    """Session manager built on first use, so importing this module makes no network
+    calls and skips the agent and LLM imports until the first turn"""
+    global _sessions
+    if _sessions is None:
+        with _sessions_lock:
+            if _sessions is None:
+                from langchain.agents import Tool
+                from llm_backends import get_llm
+                from sessions import SessionManager
+                tools = [Tool(name="Symptom Checker", func=symptom_checker, description="Check illness based on symptoms.")]
+                _sessions = SessionManager(get_llm(), tools)
+    return _sessions
+
+def _run_turn(message, session_id, callbacks=None):
+    session = get_sessions().get(session_id)
+    start = time.perf_counter()
+    # Tool calls are counted per turn, not as deltas of the shared counters,
+    # so concurrent turns don't pick up each other's calls
+    with count_tool_calls() as counts:
+        try:
+            # Turns within one session are serialized so its memory stays ordered
+            with session.lock:
+                return session.agent.run(input=message, callbacks=callbacks)
+        finally:
+            elapsed = time.perf_counter() - start
+            with _stats_lock:
+                turn_stats["turns"] += 1
+                turn_stats["total_seconds"] += elapsed
+                turn_stats["tool_calls"] += counts["calls"]
+                turn_stats["tool_cache_hits"] += counts["cache_hits"]
+            logging.info(f"Agent turn took {elapsed:.2f}s with {counts['calls']} tool calls ({counts['cache_hits']} cached)")
+
+def ask_bot(message, session_id="default"):
+    return _run_turn(message, session_id)
+
+
+class _QueueHandler(BaseCallbackHandler):
+    """Forwards tokens, tool calls and tool results to a queue as they happen"""
+
+    def __init__(self, events):
+        self.events = events
+        self._streamed = False
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        self._streamed = False
+
+    def on_llm_new_token(self, token, **kwargs):
+        self._streamed = True
+        self.events.put(("token", token))
+
+    def on_llm_end(self, response, **kwargs):
+        # Backends that can't stream still deliver their text in one piece
+        if not self._streamed:
+            for generations in response.generations:
+                for generation in generations:
+                    self.events.put(("token", generation.text))
+
+    def on_agent_action(self, action, **kwargs):
+        self.events.put(("tool_start", {"tool": action.tool, "input": action.tool_input}))
+
+    def on_tool_end(self, output, **kwargs):
+        self.events.put(("tool_end", str(output)))
+
+
+def stream_ask_bot(message, session_id="default"):
+    """Run an agent turn, yielding (kind, payload) events as they arrive.
+
+    kind is "token", "tool_start", "tool_end", then "final" with the answer,
+    or "error" with the exception.
+    """
+    events = queue.Queue()
+    done = object()
+
+    def worker():
+        try:
+            events.put(("final", _run_turn(message, session_id, callbacks=[_QueueHandler(events)])))
+        except Exception as e:
+            events.put(("error", e))
+        finally:
+            events.put(done)
+
+    threading.Thread(target=worker, name="ask-bot-stream", daemon=True).start()
+    while True:
+        event = events.get()
+        if event is done:
+            return
+        yield event
+
+def get_stats():
+    """Agent turn and tool call counters since startup"""
+    with _stats_lock:
+        stats = dict(turn_stats)
+    stats.update({f"checker_{k}": v for k, v in get_tool_stats().items()})
+    stats["active_sessions"] = len(_sessions) if _sessions is not None else 0
+    if stats["turns"]:
+        stats["avg_turn_seconds"] = stats["total_seconds"] / stats["turns"]
+    return stats
@@ -0,0 +1,104 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from langchain.agents import AgentExecutor, ZeroShotAgent
+from langchain.chains import LLMChain
+from langchain.memory import ConversationBufferWindowMemory, ConversationSummaryBufferMemory
+
+MAX_SESSIONS = int(os.environ.get("CHAT_MAX_SESSIONS", 5000))
+IDLE_TIMEOUT_SECONDS = int(os.environ.get("CHAT_IDLE_TIMEOUT", 30 * 60))
+# "window" keeps the last HISTORY_WINDOW exchanges; "summary" folds older
+# turns into a running summary once the history exceeds SUMMARY_MAX_TOKENS
+MEMORY_MODE = os.environ.get("CHAT_MEMORY", "window")
+HISTORY_WINDOW = int(os.environ.get("CHAT_HISTORY_WINDOW", 5))
+SUMMARY_MAX_TOKENS = int(os.environ.get("CHAT_SUMMARY_MAX_TOKENS", 500))
+
+PROMPT_SUFFIX = """Begin!
+
+Previous conversation:
+{chat_history}
+
+Question: {input}
+Thought:{agent_scratchpad}"""
+
+
+class ChatSession:
+    """One user's agent and bounded conversation memory"""
+
+    def __init__(self, agent, memory):
+        self.agent = agent
+        self.memory = memory
+        self.last_used = time.monotonic()
+        self.lock = threading.Lock()
+
+
+def build_memory(llm, mode=MEMORY_MODE):
+    if mode == "summary":
+        return ConversationSummaryBufferMemory(llm=llm, max_token_limit=SUMMARY_MAX_TOKENS,
+                                               memory_key="chat_history", input_key="input")
+    return ConversationBufferWindowMemory(k=HISTORY_WINDOW, memory_key="chat_history", input_key="input")
+
+
+def build_agent(llm, tools, memory):
+    """Zero-shot ReAct agent whose prompt includes the session's history"""
+    prompt = ZeroShotAgent.create_prompt(
+        tools,
+        suffix=PROMPT_SUFFIX,
+        input_variables=["input", "chat_history", "agent_scratchpad"]
+    )
+    agent = ZeroShotAgent(llm_chain=LLMChain(llm=llm, prompt=prompt), allowed_tools=[t.name for t in tools])
+    return AgentExecutor.from_agent_and_tools(agent=agent, tools=tools, memory=memory, verbose=True)
+
+
+class SessionManager:
+    """Per-user chat sessions with an LRU cap and idle expiry.
+
+    The LLM and tools are shared; each session only owns its memory and a
+    lightweight agent wrapper, so the cost per session is its history.
+    """
+
+    def __init__(self, llm, tools, max_sessions=MAX_SESSIONS, idle_timeout=IDLE_TIMEOUT_SECONDS):
+        self.llm = llm
+        self.tools = tools
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self._sessions = OrderedDict()  # session_id -> ChatSession, least recently used first
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def get(self, session_id):
+        """Return the session for an ID, creating it (and evicting others) as needed"""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            session = self._sessions.get(session_id)
+            if session is None:
+                memory = build_memory(self.llm)
+                session = ChatSession(build_agent(self.llm, self.tools, memory), memory)
+                self._sessions[session_id] = session
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            else:
+                self._sessions.move_to_end(session_id)
+            session.last_used = now
+            return session
+
+    def _expire(self, now):
+        # Sessions are ordered by last use, so idle ones are at the front
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_used < self.idle_timeout:
+                break
+            del self._sessions[session_id]
+
+    def expire_idle(self):
+        with self._lock:
+            self._expire(time.monotonic())
+
+    def end(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
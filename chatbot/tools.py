@@ -1,9 +1,137 @@
-import requests
+import contextvars
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
 from langchain.tools import tool
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend_client import BackendError, get_backend_client
+
+# "http" calls the backend service; "inprocess" calls the predictor directly
+# when the chatbot runs alongside the model
+SYMPTOM_CHECKER_MODE = os.environ.get("SYMPTOM_CHECKER_MODE", "http")
+CACHE_SIZE = 1024
+CACHE_TTL_SECONDS = 300
+# How often the served model version is re-read in http mode
+VERSION_CHECK_SECONDS = 5
+
+_cache = OrderedDict()  # (model_version, symptom set) -> (stored_at, result)
+_cache_lock = threading.Lock()
+_latest_version = None
+_version_checked_at = 0.0
+tool_stats = {"calls": 0, "cache_hits": 0, "predictions": 0, "prediction_seconds": 0.0}
+# Counters for the agent turn running in the current context, if any
+_turn_counts = contextvars.ContextVar("turn_counts", default=None)
+
+
+def get_tool_stats():
+    """Snapshot of the checker counters since startup"""
+    with _cache_lock:
+        return dict(tool_stats)
+
+
+@contextmanager
+def count_tool_calls():
+    """Count the checker calls made in this context, e.g. during one agent turn.
+
+    Yields a {"calls", "cache_hits"} dict that is filled in as tools run,
+    so concurrent turns never see each other's calls.
+    """
+    counts = {"calls": 0, "cache_hits": 0}
+    token = _turn_counts.set(counts)
+    try:
+        yield counts
+    finally:
+        _turn_counts.reset(token)
+
+
+def split_symptoms(symptoms):
+    """Stripped symptom tokens in their original case and order, as the model receives them"""
+    return [s.strip() for s in symptoms.split(",") if s.strip()]
+
+
+def normalize_symptoms(symptoms):
+    """Order-independent cache key for a comma-separated symptom string.
+
+    Case is kept: the model's vocabulary is case-sensitive, so "Fever" and
+    "fever" can predict differently.
+    """
+    return tuple(sorted(set(split_symptoms(symptoms))))
+
+
+def _predict(symptom_list):
+    if SYMPTOM_CHECKER_MODE == "inprocess":
+        from backend.predictor import predict_one
+        return predict_one(symptom_list)
+    return get_backend_client().predict(symptom_list)
+
+
+def current_model_version():
+    """Version of the model that will answer the next prediction"""
+    global _version_checked_at
+    if SYMPTOM_CHECKER_MODE == "inprocess":
+        from backend.predictor import model_version
+        return model_version()
+    now = time.monotonic()
+    if now - _version_checked_at >= VERSION_CHECK_SECONDS:
+        _version_checked_at = now
+        try:
+            _set_latest_version(get_backend_client().request("GET", "/").json().get("model_version"))
+        except BackendError:
+            pass  # Keep the last known version; the prediction call will surface the outage
+    return _latest_version
+
+
+def _set_latest_version(version):
+    global _latest_version
+    with _cache_lock:
+        if version is not None and version != _latest_version:
+            # Entries for the old model can no longer be hit; free them
+            _latest_version = version
+            _cache.clear()
+
+
+def check_symptoms(symptoms):
+    """Prediction for a symptom string, memoized per (model version, symptoms)"""
+    symptom_list = split_symptoms(symptoms)
+    key = (current_model_version(), normalize_symptoms(symptoms))
+    counts = _turn_counts.get()
+    with _cache_lock:
+        tool_stats["calls"] += 1
+        if counts is not None:
+            counts["calls"] += 1
+        cached = _cache.get(key)
+        if cached is not None:
+            stored_at, result = cached
+            if time.monotonic() - stored_at < CACHE_TTL_SECONDS:
+                _cache.move_to_end(key)
+                tool_stats["cache_hits"] += 1
+                if counts is not None:
+                    counts["cache_hits"] += 1
+                return result
+            del _cache[key]
+
+    start = time.perf_counter()
+    result = _predict(symptom_list)
+    elapsed = time.perf_counter() - start
+
+    version = result.get("model_version")
+    _set_latest_version(version)
+    with _cache_lock:
+        tool_stats["predictions"] += 1
+        tool_stats["prediction_seconds"] += elapsed
+        _cache[(version, key[1])] = (time.monotonic(), result)
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return result
+
+
 @tool
 def symptom_checker(symptoms: str) -> str:
-    symptom_list = symptoms.split(", ")
-    response = requests.post("http://localhost:8000/predict", json={"symptoms": symptom_list})
-    result = response.json()
+    """Check illness based on symptoms."""
+    result = check_symptoms(symptoms)
     return f"The predicted disease is: {result['disease']}"
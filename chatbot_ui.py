@@ -1,8 +1,9 @@
 import gradio as gr
-import requests
-from translate import translate_text
-
-API_URL = "http://127.0.0.1:8000/predict"
+from backend_client import get_backend_client
+from emergency_detector import detect_emergency, emergency_guidance
+from flagging import BatchedFlaggingCallback
+from tracing import span, trace
+from translate import translate
 
 # Supported languages (code: label)
 LANGUAGES = {
@@ -19,27 +20,36 @@ LANGUAGES = {
 }
 
 def get_prediction(symptoms, lang_code):
-    try:
-        # Translate symptoms to English
-        symptoms_en = translate_text(symptoms, source_lang=lang_code, target_lang="en")
+    # Red flags are answered locally, before any translation or backend call
+    if detect_emergency(symptoms):
+        return emergency_guidance(lang_code)
+
+    with trace("gradio.predict"):
+        try:
+            # Translate symptoms to English
+            with span("translate.input", lang=lang_code):
+                symptoms_en = translate(symptoms, source_lang=lang_code, target_lang="en")
+            if symptoms_en.degraded:
+                return "⚠️ Translation is unavailable right now. Please try again or enter your symptoms in English."
 
-        # Clean input
-        symptoms_list = [s.strip() for s in symptoms_en.split(",") if s.strip()]
+            # Clean input
+            symptoms_list = [s.strip() for s in symptoms_en.text.split(",") if s.strip()]
 
-        # Request prediction
-        response = requests.post(API_URL, json={"symptoms": symptoms_list})
-        response.raise_for_status()
-        result = response.json()
+            # Request prediction
+            result = get_backend_client().predict(symptoms_list)
 
-        # Format result in English
-        output_en = f"🧠 Predicted Disease: {result['disease']}\n💡 Medical Advice: {result['advice']}"
+            # Format result in English
+            output_en = f"🧠 Predicted Disease: {result['disease']}\n💡 Medical Advice: {result['advice']}"
 
-        # Translate result back to user's language
-        output_translated = translate_text(output_en, source_lang="en", target_lang=lang_code)
-        return output_translated
+            # Translate result back to user's language
+            with span("translate.output", lang=lang_code):
+                output_translated = translate(output_en, source_lang="en", target_lang=lang_code)
+            if output_translated.degraded:
+                return output_en + "\n\n⚠️ Translation is temporarily unavailable; showing English."
+            return output_translated.text
 
-    except Exception as e:
-        return f"⚠️ Error: {str(e)}"
+        except Exception as e:
+            return f"⚠️ Error: {str(e)}"
 
 iface = gr.Interface(
     fn=get_prediction,
@@ -49,7 +59,8 @@ iface = gr.Interface(
     ],
     outputs=gr.Textbox(label="Predicted Disease & Advice (in your language)"),
     title="🌍 Multilingual AI Healthcare Chatbot",
-    description="Enter symptoms and choose your language. The chatbot will respond in that language."
+    description="Enter symptoms and choose your language. The chatbot will respond in that language.",
+    flagging_callback=BatchedFlaggingCallback()
 )
 
 if __name__ == "__main__":
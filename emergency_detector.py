@@ -0,0 +1,252 @@
+"""Local red-flag detector for emergency symptoms.
+
+Runs before any translation or backend call, so users describing an
+emergency get guidance immediately even when those services are down.
+Keyword tables cover every language the frontends offer; they are compiled
+once, at import, into a single regular expression.
+"""
+import re
+import unicodedata
+
+EMERGENCY_NUMBER = "108"
+
+# Red-flag phrases by category and language. Phrases in Latin or Cyrillic
+# script must start at a word boundary but may continue ("convulsion"
+# also matches "convulsions"), except those in WHOLE_WORD_PHRASES; other
+# scripts match anywhere in the text.
+RED_FLAGS = {
+    "chest_pain": {
+        "en": ["chest pain", "chest tightness", "pain in my chest", "crushing chest", "heart attack"],
+        "es": ["dolor de pecho", "dolor en el pecho", "opresión en el pecho", "ataque al corazón", "infarto"],
+        "fr": ["douleur thoracique", "douleur à la poitrine", "douleur dans la poitrine", "crise cardiaque", "infarctus"],
+        "de": ["brustschmerz", "schmerzen in der brust", "engegefühl in der brust", "herzinfarkt"],
+        "ta": ["நெஞ்சு வலி", "நெஞ்சுவலி", "மார்பு வலி", "மாரடைப்பு"],
+        "hi": ["सीने में दर्द", "छाती में दर्द", "दिल का दौरा"],
+        "zh": ["胸痛", "胸口痛", "胸口疼", "心脏病发作"],
+        "ar": ["ألم في الصدر", "ألم الصدر", "نوبة قلبية"],
+        "ru": ["боль в груди", "боли в груди", "сердечный приступ", "инфаркт"],
+        "ja": ["胸の痛み", "胸が痛い", "心臓発作"],
+    },
+    "breathing": {
+        "en": ["shortness of breath", "short of breath", "can't breathe", "cannot breathe",
+               "difficulty breathing", "trouble breathing", "struggling to breathe"],
+        "es": ["falta de aire", "dificultad para respirar", "no puedo respirar"],
+        "fr": ["essoufflement", "difficulté à respirer", "difficultés respiratoires", "je ne peux pas respirer"],
+        "de": ["atemnot", "kurzatmig", "kann nicht atmen"],
+        "ta": ["மூச்சுத் திணறல்", "மூச்சு திணறல்", "மூச்சு விட முடியவில்லை", "சுவாசிப்பதில் சிரமம்"],
+        "hi": ["सांस लेने में तकलीफ", "साँस लेने में तकलीफ", "सांस लेने में दिक्कत", "सांस फूलना"],
+        "zh": ["呼吸困难", "呼吸急促", "喘不过气", "无法呼吸"],
+        "ar": ["ضيق في التنفس", "ضيق التنفس", "صعوبة في التنفس", "لا أستطيع التنفس"],
+        "ru": ["одышка", "трудно дышать", "не могу дышать", "затрудненное дыхание"],
+        "ja": ["息切れ", "呼吸困難", "息ができない", "息苦しい"],
+    },
+    "stroke": {
+        "en": ["stroke", "face drooping", "slurred speech", "sudden numbness"],
+        "es": ["derrame cerebral", "accidente cerebrovascular", "cara caída", "habla arrastrada"],
+        "fr": ["avc", "accident vasculaire cérébral", "visage affaissé"],
+        "de": ["schlaganfall", "hängender mundwinkel", "verwaschene sprache"],
+        "ta": ["பக்கவாதம்"],
+        "hi": ["लकवा", "स्ट्रोक"],
+        "zh": ["中风", "脑卒中", "口齿不清"],
+        "ar": ["سكتة دماغية", "جلطة دماغية"],
+        "ru": ["инсульт"],
+        "ja": ["脳卒中", "ろれつが回らない"],
+    },
+    "unconscious": {
+        "en": ["unconscious", "passed out", "fainted", "not breathing", "unresponsive"],
+        "es": ["inconsciente", "se desmayó", "desmayo", "no respira"],
+        "fr": ["inconscient", "évanoui", "perte de connaissance", "ne respire pas"],
+        "de": ["bewusstlos", "ohnmächtig", "atmet nicht"],
+        "ta": ["சுயநினைவு இழந்", "மயக்கம்"],
+        "hi": ["बेहोश"],
+        "zh": ["昏迷", "晕倒", "失去知觉"],
+        "ar": ["فاقد الوعي", "إغماء", "أغمي عليه"],
+        "ru": ["без сознания", "потерял сознание", "потеряла сознание", "обморок"],
+        "ja": ["意識がない", "気絶", "失神"],
+    },
+    "bleeding": {
+        "en": ["severe bleeding", "heavy bleeding", "won't stop bleeding", "coughing blood",
+               "coughing up blood", "vomiting blood"],
+        "es": ["sangrado abundante", "hemorragia", "tos con sangre", "vómito con sangre"],
+        "fr": ["saignement abondant", "hémorragie", "crache du sang", "vomit du sang"],
+        "de": ["starke blutung", "blutung hört nicht auf", "blut husten", "blut erbrechen"],
+        "ta": ["அதிக இரத்தப்போக்கு", "இரத்த வாந்தி"],
+        "hi": ["बहुत खून बह", "खून की उल्टी", "खांसी में खून"],
+        "zh": ["大出血", "咳血", "吐血"],
+        "ar": ["نزيف حاد", "نزيف شديد", "سعال دموي", "تقيؤ دم"],
+        "ru": ["сильное кровотечение", "кашель с кровью", "рвота кровью"],
+        "ja": ["大量出血", "吐血", "喀血"],
+    },
+    "seizure": {
+        "en": ["seizure", "convulsion"],
+        "es": ["convulsión", "convulsiones", "ataque epiléptico"],
+        "fr": ["convulsion", "crise d'épilepsie"],
+        "de": ["krampfanfall", "krampfanfälle"],
+        "ta": ["வலிப்பு"],
+        "hi": ["दौरा पड़", "मिर्गी"],
+        "zh": ["抽搐", "癫痫发作"],
+        "ar": ["تشنج", "نوبة صرع"],
+        "ru": ["судорог", "приступ эпилепсии"],
+        "ja": ["けいれん", "痙攣"],
+    },
+    "self_harm": {
+        "en": ["suicide", "suicidal", "kill myself", "end my life"],
+        "es": ["suicidio", "suicidarme", "quitarme la vida"],
+        "fr": ["suicide", "me suicider", "mettre fin à mes jours"],
+        "de": ["selbstmord", "suizid", "mich umbringen"],
+        "ta": ["தற்கொலை"],
+        "hi": ["आत्महत्या", "खुदकुशी"],
+        "zh": ["自杀", "轻生"],
+        "ar": ["انتحار", "أقتل نفسي"],
+        "ru": ["суицид", "самоубийств", "покончить с собой"],
+        "ja": ["自殺", "死にたい"],
+    },
+}
+
+# Phrases that must end at a word boundary (an "s" plural is allowed), so
+# "stroke" matches "strokes" but not "stroked"
+WHOLE_WORD_PHRASES = {"stroke"}
+
+# Shown instead of a diagnosis; kept local so no translation call is needed
+EMERGENCY_GUIDANCE = {
+    "en": "🚨 Your symptoms may be a medical emergency. Call an ambulance now: {number}. Do not wait for an online diagnosis.",
+    "es": "🚨 Sus síntomas pueden ser una emergencia médica. Llame a una ambulancia ahora: {number}. No espere un diagnóstico en línea.",
+    "fr": "🚨 Vos symptômes peuvent indiquer une urgence médicale. Appelez une ambulance maintenant : {number}. N'attendez pas un diagnostic en ligne.",
+    "de": "🚨 Ihre Symptome können ein medizinischer Notfall sein. Rufen Sie sofort einen Krankenwagen: {number}. Warten Sie nicht auf eine Online-Diagnose.",
+    "ta": "🚨 உங்கள் அறிகுறிகள் மருத்துவ அவசரநிலையாக இருக்கலாம். உடனே ஆம்புலன்ஸை அழைக்கவும்: {number}. ஆன்லைன் கண்டறிதலுக்காக காத்திருக்க வேண்டாம்.",
+    "hi": "🚨 आपके लक्षण चिकित्सा आपातकाल हो सकते हैं। अभी एम्बुलेंस बुलाएँ: {number}। ऑनलाइन निदान की प्रतीक्षा न करें।",
+    "zh": "🚨 您的症状可能属于医疗紧急情况。请立即拨打急救电话：{number}。不要等待在线诊断。",
+    "ar": "🚨 قد تشير أعراضك إلى حالة طبية طارئة. اتصل بالإسعاف الآن: {number}. لا تنتظر التشخيص عبر الإنترنت.",
+    "ru": "🚨 Ваши симптомы могут указывать на неотложное состояние. Немедленно вызовите скорую помощь: {number}. Не ждите онлайн-диагноза.",
+    "ja": "🚨 あなたの症状は緊急事態の可能性があります。今すぐ救急車を呼んでください：{number}。オンライン診断を待たないでください。",
+}
+
+
+# Phrases that contain a red flag but are not one. Their text is blanked out
+# before matching, so only the red flag inside them is ignored.
+FALSE_FRIENDS = [
+    r"\b(?:heat|sun) ?stroke",
+    r"\bstroke of (?:luck|genius)",
+    r"\b(?:swimming|swim|back|paddle|brush|pen|key) ?strokes?",
+    r"\bstrok(?:ed|ing)\b",
+    r"\b(?:not breathing|can't breathe|cannot breathe|difficulty breathing|trouble breathing)"
+    r"(?: \w+){0,2} (?:through|out of|with) (?:my|his|her|their|your|the|one) (?:nose|nostrils?)",
+    r"\b(?:app|application|website|site|page|screen|phone|computer|laptop|browser|program|system|button|server)"
+    r"(?: \w+){0,3} unresponsive",
+]
+
+# Words that negate a red flag when they come directly before it ("no chest
+# pain", "denies chest pain"). "never" is not one: "never had chest pain
+# this bad" is a red flag.
+NEGATIONS = {
+    "no", "not", "without", "deny", "denies", "denied", "don't", "doesn't", "didn't", "haven't", "hasn't",
+    "sin", "sans", "pas", "aucun", "aucune", "kein", "keine", "keinen", "keiner", "ohne", "nicht", "нет", "без", "не",
+}
+CJK_NEGATIONS = ("没有", "没", "无", "不")
+# Verbs allowed between a negation and the red flag ("I don't have chest pain")
+NEGATION_FILLERS = {"have", "has", "had", "any", "feel", "feeling"}
+# Negation doesn't carry across punctuation or a conjunction ("no fever but chest pain")
+CLAUSE_BREAK = re.compile(r"[.,;:!?\n。，；！？、]|\b(?:but|and|or|pero|y|o|mais|et|ou|aber|und|oder|но|и|или)\b")
+WORD = re.compile(r"\w+(?:'\w+)*")
+
+# Expected results, checked by running this module
+EXAMPLES = [
+    ("I have crushing chest pain", ["chest_pain"]),
+    ("My father can't breathe and has slurred speech", ["breathing", "stroke"]),
+    ("Tengo dolor de pecho y no puedo respirar", ["chest_pain", "breathing"]),
+    ("Douleur thoracique depuis une heure", ["chest_pain"]),
+    ("他晕倒了，而且胸痛", ["chest_pain", "unconscious"]),
+    ("He is not breathing", ["unconscious"]),
+    ("She is unresponsive", ["unconscious"]),
+    ("No fever but severe chest pain", ["chest_pain"]),
+    ("I think I had heat stroke yesterday", []),
+    ("Got a mild sunstroke at the beach", []),
+    ("I'm not breathing well through my nose", []),
+    ("I can't breathe through my nose since the cold started", []),
+    ("The app is unresponsive when I upload a file", []),
+    ("No chest pain, just a cough", []),
+    ("I don't have shortness of breath", []),
+    ("The patient denies chest pain", []),
+    ("Sin dolor de pecho", []),
+    ("Keine Atemnot, nur Husten", []),
+    ("没有胸痛", []),
+    ("I am not suicidal", []),
+    ("Never had chest pain this bad before", ["chest_pain"]),
+    ("I didn't have any chest pain", []),
+    ("My mother had a stroke last year", ["stroke"]),
+    ("He has had two strokes", ["stroke"]),
+    ("I stroked my cat", []),
+    ("My back stroke is weak", []),
+]
+
+
+def normalize_text(text):
+    """Casefold, unify apostrophes and drop Latin accents, so unaccented input still matches"""
+    text = unicodedata.normalize("NFKD", str(text).replace("’", "'")).casefold()
+    # Only strip the Latin combining marks; Indic vowel signs are marks too
+    text = "".join(ch for ch in text if not "\u0300" <= ch <= "\u036f")
+    return unicodedata.normalize("NFC", text)
+
+
+def _phrase_pattern(phrase):
+    phrase = normalize_text(phrase)
+    pattern = re.escape(phrase)
+    if phrase[0].isalpha() and ord(phrase[0]) < 0x0590:  # Latin, Greek or Cyrillic
+        pattern = r"\b" + pattern
+    if phrase in WHOLE_WORD_PHRASES:
+        pattern += r"s?\b"
+    return pattern
+
+
+def _compile(red_flags):
+    groups = []
+    for category, languages in red_flags.items():
+        phrases = sorted({p for table in languages.values() for p in table}, key=len, reverse=True)
+        groups.append(f"(?P<{category}>{'|'.join(_phrase_pattern(p) for p in phrases)})")
+    return re.compile("|".join(groups))
+
+
+_PATTERN = _compile(RED_FLAGS)
+_FALSE_FRIENDS = re.compile("|".join(FALSE_FRIENDS))
+
+
+def _negated(text, start):
+    """Whether a negation word comes directly before position start, skipping filler verbs"""
+    clause = CLAUSE_BREAK.split(text[:start])[-1]
+    for word in reversed(WORD.findall(clause)):
+        if word in NEGATIONS or word.endswith(CJK_NEGATIONS):
+            return True
+        if word not in NEGATION_FILLERS:
+            return False
+    return False
+
+
+def detect_emergency(text):
+    """Red-flag categories found in free text in any supported language, in table order.
+
+    Negated mentions ("no chest pain") and look-alike phrases ("heat stroke")
+    don't count.
+    """
+    if not text:
+        return []
+    text = _FALSE_FRIENDS.sub(lambda match: " " * len(match.group()), normalize_text(text))
+    found = {match.lastgroup for match in _PATTERN.finditer(text) if not _negated(text, match.start())}
+    return [category for category in RED_FLAGS if category in found]
+
+
+def emergency_guidance(lang="en"):
+    """Emergency instructions in the user's language, falling back to English"""
+    return EMERGENCY_GUIDANCE.get(lang, EMERGENCY_GUIDANCE["en"]).format(number=EMERGENCY_NUMBER)
+
+
+def main():
+    failures = [(text, expected, detect_emergency(text)) for text, expected in EXAMPLES
+                if detect_emergency(text) != expected]
+    for text, expected, actual in failures:
+        print(f"FAIL {text!r}: expected {expected}, got {actual}")
+    print(f"{len(EXAMPLES) - len(failures)}/{len(EXAMPLES)} examples passed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
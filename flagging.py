@@ -0,0 +1,168 @@
+import atexit
+import csv
+import glob
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+import gradio as gr
+
+FLAG_DIR = ".gradio/flagged"
+ACTIVE_FILE = "flags.jsonl"
+BATCH_SIZE = 50
+FLUSH_INTERVAL_SECONDS = 2.0
+MAX_FILE_BYTES = 10 * 1024 * 1024
+QUEUE_SIZE = 10000
+
+ERROR_MARKERS = ("⚠️", "Error contacting the API", "Failed to connect")
+CLOSE_TIMEOUT_SECONDS = 5.0
+
+_STOP = object()  # Queued by close() to make the writer flush and exit
+
+
+class BatchedFlaggingCallback(gr.FlaggingCallback):
+    """Flagging sink that queues flags and appends them as JSON lines from a background thread.
+
+    Flagging never blocks the request: rows are batched and written every
+    FLUSH_INTERVAL_SECONDS or BATCH_SIZE rows, and the active file is
+    rotated once it grows past MAX_FILE_BYTES. Flags still queued at
+    interpreter exit are written by close(), registered with atexit.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL_SECONDS,
+                 max_file_bytes=MAX_FILE_BYTES, queue_size=QUEUE_SIZE):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_file_bytes = max_file_bytes
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._labels = []
+        self._count = 0
+        self.dropped = 0
+        self._thread = None
+        self.flagging_dir = FLAG_DIR
+
+    def setup(self, components, flagging_dir=FLAG_DIR):
+        self._labels = [getattr(c, "label", None) or f"field_{i}" for i, c in enumerate(components)]
+        self.flagging_dir = flagging_dir
+        os.makedirs(flagging_dir, exist_ok=True)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._writer, name="flag-writer", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def flag(self, flag_data, flag_option="", username=None):
+        values = [v if isinstance(v, (str, int, float, bool)) or v is None else str(v) for v in flag_data]
+        record = {
+            "timestamp": datetime.now().isoformat(),
+            "fields": dict(zip(self._labels, values)),
+            "flag_option": flag_option or "",
+            "username": username,
+        }
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+        self._count += 1
+        return self._count
+
+    def _writer(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            try:
+                self._write(batch)
+            except Exception:
+                # Keep the writer alive; a full disk or bad path loses this batch only
+                logging.exception(f"Failed to write {len(batch)} flags to {self.flagging_dir}")
+
+    def close(self, timeout=CLOSE_TIMEOUT_SECONDS):
+        """Write out the flags still queued and stop the writer thread"""
+        thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            logging.warning(f"Flag queue still full after {timeout}s; unwritten flags may be lost")
+            return
+        thread.join(timeout)
+
+    def _write(self, batch):
+        path = os.path.join(self.flagging_dir, ACTIVE_FILE)
+        if os.path.exists(path) and os.path.getsize(path) >= self.max_file_bytes:
+            rotated = os.path.join(self.flagging_dir, f"flags-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}.jsonl")
+            os.replace(path, rotated)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in batch))
+
+
+def iter_flags(flagging_dir=FLAG_DIR):
+    """Yield (symptoms, output) for every flag, including the legacy Gradio CSV files"""
+    for path in sorted(glob.glob(os.path.join(flagging_dir, "*.jsonl"))):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    values = list(json.loads(line)["fields"].values())
+                except (json.JSONDecodeError, KeyError):
+                    continue
+                if values:
+                    yield str(values[0] or ""), str(values[-1] or "")
+    for path in sorted(glob.glob(os.path.join(flagging_dir, "*.csv"))):
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            rows = csv.reader(f)
+            next(rows, None)
+            for row in rows:
+                # Columns are the inputs, the output, then a timestamp
+                if len(row) >= 3:
+                    yield row[0], row[-2]
+
+
+def is_error(output):
+    return not output.strip() or any(marker in output for marker in ERROR_MARKERS)
+
+
+def summarize_flags(flagging_dir=FLAG_DIR, top=20):
+    """Error rate and the most common symptom sets among flagged requests"""
+    total = errors = 0
+    combinations = Counter()
+    symptoms = Counter()
+    for symptom_text, output in iter_flags(flagging_dir):
+        total += 1
+        errors += is_error(output)
+        items = sorted({s.strip().lower() for s in symptom_text.split(",") if s.strip()})
+        if items:
+            combinations[", ".join(items)] += 1
+            symptoms.update(items)
+    return {
+        "total": total,
+        "errors": errors,
+        "error_rate": errors / total if total else 0.0,
+        "symptom_combinations": combinations.most_common(top),
+        "symptoms": symptoms.most_common(top),
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(summarize_flags(sys.argv[1] if len(sys.argv) > 1 else FLAG_DIR), indent=2, ensure_ascii=False))
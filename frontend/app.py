@@ -1,15 +1,27 @@
 import streamlit as st
-import requests
 import json
-import base64
-from deep_translator import GoogleTranslator
+import logging
 import os
+import sys
+import time
 from datetime import datetime, timedelta
-import pandas as pd
-import uuid
+
+# Shared modules (backend client, translation) live at the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.knowledge_base import get_knowledge_base
+from emergency_detector import EMERGENCY_NUMBER, detect_emergency, emergency_guidance
+from tracing import span, trace
+# Cached, rate-limited and coalesced across sessions; see translate.py
+from translate import DEGRADED_WINDOW_SECONDS, translate_batch
+from appointment_store import AppointmentStore
+from chat_store import ChatStore
+from document_server import document_url, start_document_server
+from document_store import DocumentStore
+from medication_index import PAGE_SIZE as MEDICATION_PAGE_SIZE, MedicationIndex, load_translations, paginate
+from user_store import UserStore
 
 # --- Constants ---
-API_URL = "http://localhost:8000/predict"
 USER_DB = "users.json"
 DOCTOR_DB = "doctors.json"
 APPOINTMENT_DB = "appointments.json"
@@ -107,6 +119,19 @@ def load_json_file(filename, default=None):
                 json.dump(default, f)
         return default
 
+@st.cache_data(show_spinner=False, max_entries=32)
+def _read_json(filename, mtime_ns, size):
+    with open(filename, "r") as f:
+        return json.load(f)
+
+def load_json_cached(filename, default=None):
+    """Load a JSON file, re-reading it only when it changes on disk"""
+    try:
+        stat = os.stat(filename)
+    except FileNotFoundError:
+        return load_json_file(filename, default)
+    return _read_json(filename, stat.st_mtime_ns, stat.st_size)
+
 def save_json_file(filename, data):
     """Save data to JSON file"""
     with open(filename, "w") as f:
@@ -114,40 +139,34 @@ def save_json_file(filename, data):
 
 
 # --- User Authentication Functions ---
-def load_users():
-    """Load user database from JSON file"""
-    return load_json_file(USER_DB)
+@st.cache_resource
+def get_user_store():
+    """Shared user store with hashed passwords and session tokens"""
+    return UserStore(USER_DB)
+
+def user_exists(username):
+    """Check whether a username is taken"""
+    return get_user_store().exists(username)
 
 def save_user(username, password):
     """Save new user to database"""
-    users = load_users()
-    users[username] = {
-        "password": password,
-        "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "language": "en"  # Default language
-    }
-    save_json_file(USER_DB, users)
+    return get_user_store().create(username, password)
 
 def login_user(username, password):
-    """Validate user credentials"""
-    users = load_users()
-    if username in users:
-        return users[username].get("password") == password if isinstance(users[username], dict) else users[username] == password
-    return False
+    """Validate user credentials and return a session token, or None"""
+    return get_user_store().login(username, password)
+
+def logout_user(token):
+    """Invalidate a session token"""
+    get_user_store().logout(token)
 
 def update_user_language(username, language_code):
     """Update user's preferred language"""
-    users = load_users()
-    if username in users and isinstance(users[username], dict):
-        users[username]["language"] = language_code
-        save_json_file(USER_DB, users)
+    get_user_store().set_language(username, language_code)
 
 def get_user_language(username):
     """Get user's preferred language"""
-    users = load_users()
-    if username in users and isinstance(users[username], dict):
-        return users[username].get("language", "en")
-    return "en"
+    return get_user_store().get_language(username)
 
 
 # --- Doctor Management Functions ---
@@ -196,83 +215,73 @@ def load_doctors():
             "bio": "Psychiatrist specializing in anxiety, depression, and stress management."
         }
     }
-    return load_json_file(DOCTOR_DB, default_doctors)
+    return load_json_cached(DOCTOR_DB, default_doctors)
 
 # --- Appointment Management Functions ---
+@st.cache_resource
+def get_appointment_store():
+    """Shared appointment store with indexes by id, doctor/date and status"""
+    return AppointmentStore(APPOINTMENT_DB)
+
 def load_appointments():
     """Load appointments database"""
-    return load_json_file(APPOINTMENT_DB)
+    return get_appointment_store().all()
 
 def save_appointment(username, doctor_id, date, time, reason):
     """Save new appointment"""
-    appointments = load_appointments()
-    
-    # Create user's appointments list if it doesn't exist
-    if username not in appointments:
-        appointments[username] = []
-    
-    # Generate unique appointment ID
-    appointment_id = str(uuid.uuid4())
-    
-    # Add new appointment
-    appointments[username].append({
-        "id": appointment_id,
-        "doctor_id": doctor_id,
-        "date": date,
-        "time": time,
-        "reason": reason,
-        "status": "Scheduled",
-        "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    })
-    
-    save_json_file(APPOINTMENT_DB, appointments)
-    return appointment_id
+    return get_appointment_store().add(username, doctor_id, date, time, reason)
 
 def get_user_appointments(username):
     """Get appointments for a specific user"""
-    appointments = load_appointments()
-    return appointments.get(username, [])
+    return get_appointment_store().get_user_appointments(username)
 
 def cancel_appointment(username, appointment_id):
     """Cancel a specific appointment"""
-    appointments = load_appointments()
-    
-    if username in appointments:
-        for appointment in appointments[username]:
-            if appointment.get("id") == appointment_id:
-                appointment["status"] = "Cancelled"
-                save_json_file(APPOINTMENT_DB, appointments)
-                return True
-    
-    return False
+    return get_appointment_store().set_status(appointment_id, "Cancelled", username=username)
+
+def get_doctor_schedule(doctor_id, start_date, end_date=None, status="Scheduled"):
+    """Get a doctor's appointments for a date or an inclusive date range"""
+    return get_appointment_store().doctor_schedule_range(doctor_id, start_date, end_date or start_date, status)
+
+# --- Document Storage Functions ---
+@st.cache_resource
+def get_document_store():
+    """Shared document store"""
+    return DocumentStore()
+
+@st.cache_resource
+def get_document_server():
+    """Range-capable document server, started once per process; None if its port can't be bound"""
+    try:
+        return start_document_server(get_document_store())
+    except OSError as e:
+        logging.warning(f"Document server unavailable, serving documents inline: {e}")
+        return None
+
+@st.cache_resource
+def get_preview_pipeline():
+    """Shared background pool generating document thumbnails and text previews"""
+    # Imported here so pages without documents don't load the imaging stack
+    from document_previews import PreviewPipeline
+    return PreviewPipeline(get_document_store())
 
 # --- Doctor Chat Functions ---
-def load_doctor_chats():
-    """Load doctor chats database"""
-    return load_json_file(CHAT_DB)
+@st.cache_resource
+def get_chat_store():
+    """Shared doctor chat store; messages keep their translations alongside them"""
+    return ChatStore(CHAT_DB)
 
-def get_user_doctor_chats(username, doctor_id):
-    """Get chat history between user and doctor"""
-    chats = load_doctor_chats()
-    
-    chat_key = f"{username}_{doctor_id}"
-    return chats.get(chat_key, [])
+def save_doctor_chat_message(username, doctor_id, message, is_from_user=True, lang="en", translations=None):
+    """Save a new chat message written in lang, with any translations already known for it"""
+    return get_chat_store().add_message(username, doctor_id, message, is_from_user, lang, translations)
 
-def save_doctor_chat_message(username, doctor_id, message, is_from_user=True):
-    """Save a new chat message"""
-    chats = load_doctor_chats()
-    
-    chat_key = f"{username}_{doctor_id}"
-    if chat_key not in chats:
-        chats[chat_key] = []
-    
-    chats[chat_key].append({
-        "message": message,
-        "from_user": is_from_user,
-        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    })
-    
-    save_json_file(CHAT_DB, chats)
+def translate_for_chat(texts, source_lang, target_lang):
+    """Batch translation for the chat store: None where translation was unavailable"""
+    return [None if result.degraded else result.text for result in page_translate_batch(texts, source_lang, target_lang)]
+
+def get_translated_doctor_chats(username, doctor_id, lang):
+    """(message, text in lang) pairs; each message is translated once per language, then stored"""
+    return get_chat_store().translated_history(username, doctor_id, lang, translate_for_chat)
 
 
 # --- Language Support ---
@@ -290,16 +299,62 @@ LANGUAGES = {
     "ja": "Japanese"
 }
 
+def page_translate_batch(texts, source_lang, target_lang):
+    """translate_batch that remembers, for this session only, when a result fell back to the source text"""
+    results = translate_batch(texts, source_lang, target_lang)
+    if any(result.degraded for result in results):
+        st.session_state.translation_degraded_at = time.monotonic()
+    return results
+
+
+def page_translate(text, source_lang, target_lang):
+    """Single-text page_translate_batch"""
+    return page_translate_batch([text], source_lang, target_lang)[0]
+
+
+def translation_degraded_recently(window=DEGRADED_WINDOW_SECONDS):
+    """Whether this session was shown untranslated text recently"""
+    degraded_at = st.session_state.get("translation_degraded_at")
+    return degraded_at is not None and time.monotonic() - degraded_at < window
+
+
 def translate_text(text, target_lang="en", source_lang="en"):
-    """Translate text to target language"""
-    if target_lang == source_lang or not text:
-        return text
-    
-    try:
-        return GoogleTranslator(source=source_lang, target=target_lang).translate(text)
-    except Exception:
-        # Return original text if translation fails
-        return text
+    """Translate text to target language, keeping the original if translation is unavailable"""
+    return page_translate(text, source_lang, target_lang).text
+
+
+def translate_many(texts, target_lang, source_lang="en"):
+    """Translate a list of strings in one batch call, keeping originals on failure"""
+    return [result.text for result in page_translate_batch(texts, source_lang, target_lang)]
+
+
+def translate_labels(labels, lang):
+    """Page chrome in one language: one batch call, then served from the translation cache"""
+    return dict(zip(labels, translate_many(labels, lang)))
+
+
+@st.cache_resource
+def _medication_indexes():
+    """Per-language (index, translations), kept only once the translation table is complete"""
+    return {}
+
+def get_medication_index(lang):
+    """Search index and translation table for the medication guide in one language"""
+    indexes = _medication_indexes()
+    if lang in indexes:
+        return indexes[lang]
+    degraded = []
+    def translate_checked(texts, target_lang):
+        results = page_translate_batch(texts, "en", target_lang)
+        degraded.extend(result for result in results if result.degraded)
+        return [result.text for result in results]
+    entries = get_knowledge_base().subset()
+    translations = load_translations(entries, lang, translate_checked)
+    built = MedicationIndex(entries, translations), translations
+    # After a failed translation, rebuild next time instead of keeping English for good
+    if not degraded:
+        indexes[lang] = built
+    return built
 
 
 # --- Authentication Pages ---
@@ -326,8 +381,10 @@ def login_page():
         """)
     
     if login_clicked:
-        if login_user(username, password):
+        token = login_user(username, password)
+        if token:
             st.session_state.user = username
+            st.session_state.session_token = token
             st.session_state.user_language = get_user_language(username)
             st.success(f"Welcome back, {username}! Redirecting to dashboard...")
             st.rerun()
@@ -368,7 +425,7 @@ def signup_page():
             st.warning("⚠️ Password cannot be empty.")
         elif password != confirm_password:
             st.warning("⚠️ Passwords do not match.")
-        elif username in load_users():
+        elif user_exists(username):
             st.warning("⚠️ Username already exists. Please choose another.")
         else:
             save_user(username, password)
@@ -395,6 +452,22 @@ def chatbot():
     st.markdown('<div class="card">', unsafe_allow_html=True)
     st.markdown(description)
     
+    diagnosis_form(current_lang, placeholder, btn_text, symptoms_label, lang_label)
+    
+    st.markdown('</div>', unsafe_allow_html=True)
+
+def emergency_call_button(label):
+    """One-tap ambulance call, shared by the emergency page and the red-flag fast path"""
+    st.link_button(label, f"tel:{EMERGENCY_NUMBER}", type="primary", use_container_width=True)
+
+def show_emergency_guidance(lang_code):
+    """Emergency instructions and call button, rendered without any network call"""
+    st.error(emergency_guidance(lang_code))
+    emergency_call_button(f"📞 {EMERGENCY_NUMBER}")
+
+@st.fragment
+def diagnosis_form(current_lang, placeholder, btn_text, symptoms_label, lang_label):
+    """Symptom input and result; typing or diagnosing reruns only this fragment"""
     col1, col2 = st.columns([3, 1])
     
     with col1:
@@ -410,30 +483,39 @@ def chatbot():
         # Map selected language label back to its code
         lang_code = [k for k, v in LANGUAGES.items() if v == selected_lang_label][0]
         
-        # Update user's preferred language if changed
+        # Update user's preferred language if changed, re-rendering the whole page in it
         if lang_code != current_lang:
             update_user_language(st.session_state.user, lang_code)
             st.session_state.user_language = lang_code
+            st.rerun()
     
     diagnosis_clicked = st.button(btn_text, use_container_width=True)
     
-    if diagnosis_clicked and symptoms_input:
-        with st.spinner(translate_text("Analyzing your symptoms...", lang_code)):
+    if diagnosis_clicked and symptoms_input and detect_emergency(symptoms_input):
+        # Red flags skip translation and the model, which are slow and may be down
+        show_emergency_guidance(lang_code)
+    elif diagnosis_clicked and symptoms_input:
+        with st.spinner(translate_text("Analyzing your symptoms...", lang_code)), trace("chatbot.diagnosis"):
             try:
                 # Translate input to English
-                translated_input = GoogleTranslator(source=lang_code, target="en").translate(symptoms_input)
-                symptoms_list = [s.strip() for s in translated_input.split(",") if s.strip()]
+                with span("translate.input", lang=lang_code):
+                    translated_input = page_translate(symptoms_input, lang_code, "en")
+                if translated_input.degraded:
+                    # Untranslated symptoms would only produce a meaningless prediction
+                    raise RuntimeError("Translation is unavailable right now. Please try again or describe your symptoms in English.")
+                symptoms_list = [s.strip() for s in translated_input.text.split(",") if s.strip()]
                 
-                # API call to FastAPI backend
-                response = requests.post(API_URL, json={"symptoms": symptoms_list})
-                response.raise_for_status()
-                result = response.json()
+                # API call to FastAPI backend over the shared pooled client,
+                # imported here so other pages don't pay for loading httpx
+                from backend_client import get_backend_client
+                result = get_backend_client().predict(symptoms_list)
                 
                 # Create a nicely formatted result
                 result_en = f"🔍 **Possible Condition**: {result['disease']}\n\n💡 **Recommendations**: {result['advice']}"
                 
                 # Translate output to user's language
-                result_translated = GoogleTranslator(source="en", target=lang_code).translate(result_en)
+                with span("translate.output", lang=lang_code):
+                    result_translated = page_translate(result_en, "en", lang_code).text
                 
                 st.markdown('<div style="background-color:#e3f2fd; padding:15px; border-radius:5px; border-left:5px solid #3498db;">', unsafe_allow_html=True)
                 st.markdown(result_translated)
@@ -443,8 +525,6 @@ def chatbot():
                 st.error(f"⚠️ {translate_text('Error', lang_code)}: {str(e)}")
     elif diagnosis_clicked and not symptoms_input:
         st.warning(f"⚠️ {translate_text('Please describe your symptoms first.', lang_code)}")
-    
-    st.markdown('</div>', unsafe_allow_html=True)
 
 def medication_guide():
     """Medication Reference Guide"""
@@ -453,7 +533,9 @@ def medication_guide():
     # Translate the page content
     title = translate_text("💊 Medication Guide", current_lang)
     description = translate_text("Browse common medications for various conditions. **Note**: Always consult with a healthcare professional before taking any medication.", current_lang)
-    select_condition = translate_text("Select Condition", current_lang)
+    search_label = translate_text("Search conditions or medications", current_lang)
+    page_label = translate_text("Page", current_lang)
+    no_results = translate_text("No conditions match your search.", current_lang)
     recommended_meds = translate_text("Recommended Medications:", current_lang)
     disclaimer = translate_text("⚠️ This information is for educational purposes only and is not a substitute for professional medical advice.", current_lang)
     
@@ -462,77 +544,36 @@ def medication_guide():
     st.markdown('<div class="card">', unsafe_allow_html=True)
     st.markdown(description)
     
-    # Dictionary of diseases and their medications
-    meds = {
-        "Bacterial Infection": {
-            "medications": ["Amoxicillin", "Azithromycin"],
-            "description": "Antibiotics that fight bacteria in your body. Complete the full course even if you feel better."
-        },
-        "Viral Infection": {
-            "medications": ["Paracetamol", "Rest & fluids"],
-            "description": "Most viral infections resolve with rest, fluids and symptom management. Antibiotics are not effective."
-        },
-        "Migraine": {
-            "medications": ["Ibuprofen", "Sumatriptan"],
-            "description": "Pain relievers and triptans can help relieve migraine symptoms. Rest in a dark, quiet room."
-        },
-        "Dengue": {
-            "medications": ["ORS", "Paracetamol (no NSAIDs!)"],
-            "description": "Important: Avoid aspirin and NSAIDs as they can increase bleeding risk. Focus on hydration."
-        },
-        "Common Cold": {
-            "medications": ["Antihistamines", "Cough syrup"],
-            "description": "Symptom management is key. Get plenty of rest and stay hydrated."
-        },
-        "Heart Disease": {
-            "medications": ["Nitroglycerin", "Aspirin (emergency)"],
-            "description": "Emergency medications only. Seek immediate medical attention for chest pain."
-        },
-        "Food Poisoning": {
-            "medications": ["ORS", "Loperamide"],
-            "description": "Focus on rehydration. Severe symptoms require medical attention."
-        },
-        "Respiratory Infection": {
-            "medications": ["Cough syrup", "Steam inhalation"],
-            "description": "Manage symptoms and get plenty of rest. Seek medical care if breathing becomes difficult."
-        },
-        "Tension Headache": {
-            "medications": ["Ibuprofen", "Paracetamol"],
-            "description": "Pain relievers can help. Consider stress management techniques."
-        }
-    }
+    medication_results(current_lang, search_label, page_label, no_results, recommended_meds)
     
-    # Translate diseases and descriptions
-    translated_meds = {}
-    for disease, info in meds.items():
-        translated_disease = translate_text(disease, current_lang)
-        translated_description = translate_text(info["description"], current_lang)
-        translated_medications = [translate_text(med, current_lang) for med in info["medications"]]
-        
-        translated_meds[translated_disease] = {
-            "medications": translated_medications,
-            "description": translated_description,
-            "original_disease": disease  # Keep original for reference
-        }
+    st.markdown('</div>', unsafe_allow_html=True)
     
-    col1, col2 = st.columns([1, 2])
+    # Additional disclaimer
+    st.info(disclaimer)
+
+@st.fragment
+def medication_results(current_lang, search_label, page_label, no_results, recommended_meds):
+    """Search box, pager and results; searching reruns only this fragment"""
+    # Index and translations are built once per language and served from memory
+    index, translations = get_medication_index(current_lang)
     
+    col1, col2 = st.columns([3, 1])
     with col1:
-        disease = st.selectbox(select_condition, list(translated_meds.keys()))
-    
+        query = st.text_input(search_label, key="medication_search")
+    results = index.search(query)
     with col2:
-        if disease:
-            st.markdown(f"### {disease}")
-            st.markdown(translated_meds[disease]["description"])
-            
+        page_count = max(1, -(-len(results) // MEDICATION_PAGE_SIZE))
+        page = st.number_input(page_label, min_value=1, max_value=page_count, value=1, step=1, key="medication_page")
+    
+    page_items, _ = paginate(results, page, MEDICATION_PAGE_SIZE)
+    if not page_items:
+        st.info(no_results)
+    for entry in page_items:
+        with st.expander(translations.get(entry["name"], entry["name"]), expanded=len(page_items) == 1):
+            st.markdown(translations.get(entry["description"], entry["description"]))
             st.markdown(f"#### {recommended_meds}")
-            for med in translated_meds[disease]["medications"]:
-                st.markdown(f"- **{med}**")
-    
-    st.markdown('</div>', unsafe_allow_html=True)
-    
-    # Additional disclaimer
-    st.info(disclaimer)
+            for med in entry["medications"]:
+                st.markdown(f"- **{translations.get(med, med)}**")
 
 def video_call():
     """Video Consultation Interface"""
@@ -578,6 +619,7 @@ def video_call():
 def upload_documents():
     """Medical Document Upload and Viewer"""
     current_lang = st.session_state.user_language
+    store = get_document_store()
     
     # Translate the page content
     title = translate_text("📄 Medical Documents", current_lang)
@@ -595,6 +637,7 @@ def upload_documents():
     doc_preview = translate_text("Document Preview", current_lang)
     file_details_text = translate_text("File Details", current_lang)
     viewer_text = translate_text("Your uploaded documents will appear here for preview.", current_lang)
+    my_documents = translate_text("My Documents", current_lang)
     
     st.markdown(f'<h2 class="subheader">{title}</h2>', unsafe_allow_html=True)
     
@@ -607,13 +650,47 @@ def upload_documents():
         st.markdown(description)
         
         uploaded_file = st.file_uploader(choose_file, type=["pdf", "png", "jpg", "jpeg"])
+        
+        # Stream each new upload to disk once; the uploader keeps the file across reruns
+        if uploaded_file:
+            upload_key = (uploaded_file.name, uploaded_file.size)
+            if st.session_state.get("last_upload_key") != upload_key:
+                uploaded_file.seek(0)
+                document = store.store(st.session_state.user, uploaded_file, uploaded_file.name, uploaded_file.type)
+                st.session_state.last_upload_key = upload_key
+                st.session_state.selected_document = document["id"]
+                get_preview_pipeline().request(document)
+        
+        # List documents from cached previews; missing ones are generated in the background
+        documents = store.list_documents(st.session_state.user)
+        if documents:
+            st.markdown(f"### {my_documents}")
+            previews = get_preview_pipeline()
+            for doc in documents:
+                preview = previews.get(doc)
+                col_thumb, col_info = st.columns([1, 2])
+                with col_thumb:
+                    if preview["thumbnail"]:
+                        st.image(preview["thumbnail"], use_column_width=True)
+                    elif preview["status"] == "pending":
+                        st.caption(translate_text("Generating preview...", current_lang))
+                    else:
+                        st.markdown("📄")
+                with col_info:
+                    st.markdown(f"**{doc['name']}**")
+                    st.caption(doc["uploaded_at"])
+                    if preview["text"]:
+                        st.caption(preview["text"][:160])
+                    if st.button(translate_text("View", current_lang), key=f"view_{doc['id']}"):
+                        st.session_state.selected_document = doc["id"]
     
     with col2:
-        if uploaded_file:
+        document = store.get_document(st.session_state.user, st.session_state.get("selected_document", ""))
+        if document:
             file_details = {
-                translate_text("Filename", current_lang): uploaded_file.name,
-                translate_text("File Type", current_lang): uploaded_file.type,
-                translate_text("Size", current_lang): f"{round(uploaded_file.size / 1024, 2)} KB"
+                translate_text("Filename", current_lang): document["name"],
+                translate_text("File Type", current_lang): document["type"],
+                translate_text("Size", current_lang): f"{round(document['size'] / 1024, 2)} KB"
             }
             
             st.markdown(f"### {doc_preview}")
@@ -623,13 +700,21 @@ def upload_documents():
                 for key, value in file_details.items():
                     st.markdown(f"**{key}:** {value}")
             
-            # Display the document
-            if uploaded_file.type == "application/pdf":
-                base64_pdf = base64.b64encode(uploaded_file.read()).decode('utf-8')
-                pdf_display = f'<iframe src="data:application/pdf;base64,{base64_pdf}" width="100%" height="500" style="border: none;"></iframe>'
-                st.markdown(pdf_display, unsafe_allow_html=True)
-            else:
-                st.image(uploaded_file, caption=doc_preview, use_column_width=True)
+            # Display the document from the range-capable document server, or inline without it
+            if get_document_server() is not None:
+                doc_url = document_url(st.session_state.user, document["id"])
+                if document["type"] == "application/pdf":
+                    pdf_display = f'<iframe src="{doc_url}" width="100%" height="500" style="border: none;"></iframe>'
+                    st.markdown(pdf_display, unsafe_allow_html=True)
+                else:
+                    st.image(doc_url, caption=doc_preview, use_column_width=True)
+            elif os.path.exists(store.blob_path(document["id"])):
+                blob_path = store.blob_path(document["id"])
+                if document["type"] != "application/pdf":
+                    st.image(blob_path, caption=doc_preview, use_column_width=True)
+                with open(blob_path, "rb") as f:
+                    st.download_button(translate_text("Download", current_lang), f.read(),
+                                       file_name=document["name"], mime=document["type"])
         else:
             st.markdown(f"""
             ### {doc_preview}
@@ -649,7 +734,6 @@ def emergency_call():
     dialpad_title = translate_text("Emergency Dial Pad", current_lang)
     firstaid_title = translate_text("First Aid Tips", current_lang)
     call_ambulance = translate_text("📞 Call Ambulance (108)", current_lang)
-    calling_emergency = translate_text("🚑 Calling Emergency Services: 108", current_lang)
     number_to_dial = translate_text("Number to dial", current_lang)
     call_button = translate_text("📞 Call", current_lang)
     clear_button = translate_text("🔄 Clear", current_lang)
@@ -684,44 +768,11 @@ def emergency_call():
         st.markdown(emergency_contacts)
         
         # Emergency call button
-        st.markdown('<div class="danger-button">', unsafe_allow_html=True)
-        if st.button(call_ambulance, use_container_width=True):
-            st.markdown(f"[{calling_emergency}](tel:108)", unsafe_allow_html=True)
-        st.markdown('</div>', unsafe_allow_html=True)
+        emergency_call_button(call_ambulance)
     
     with col2:
         st.markdown(f"### {dialpad_title}")
-        
-        # Initialize dialed number in session state
-        if "dialed_number" not in st.session_state:
-            st.session_state.dialed_number = ""
-        
-        # Display dialed number
-        st.text_input(number_to_dial, value=st.session_state.dialed_number, key="display_number", disabled=True)
-        
-        # Create dial pad
-        buttons = ['1', '2', '3', '4', '5', '6', '7', '8', '9', '*', '0', '#']
-        
-        # Create a 3x4 grid for the dial pad
-        for i in range(0, 12, 3):
-            cols = st.columns(3)
-            for j in range(3):
-                if i + j < len(buttons):
-                    digit = buttons[i + j]
-                    if cols[j].button(digit, key=f"btn_{digit}"):
-                        st.session_state.dialed_number += digit
-        
-        # Control buttons
-        col_call, col_clear = st.columns(2)
-        with col_call:
-            if st.button(call_button, use_container_width=True):
-                if st.session_state.dialed_number:
-                    st.markdown(f"[{calling_text} {st.session_state.dialed_number}](tel:{st.session_state.dialed_number})", unsafe_allow_html=True)
-        
-        with col_clear:
-            if st.button(clear_button, use_container_width=True):
-                st.session_state.dialed_number = ""
-                st.rerun()
+        dial_pad(number_to_dial, call_button, clear_button, calling_text)
     
     with col3:
         st.markdown(f"### {firstaid_title}")
@@ -729,6 +780,43 @@ def emergency_call():
     
     st.markdown('</div>', unsafe_allow_html=True)
 
+def _set_dialed_number(number):
+    st.session_state.dialed_number = number
+    st.session_state.display_number = number
+
+@st.fragment
+def dial_pad(number_to_dial, call_button, clear_button, calling_text):
+    """Dial pad; key presses rerun only this fragment"""
+    # Initialize dialed number in session state
+    if "dialed_number" not in st.session_state:
+        _set_dialed_number("")
+    
+    # Display dialed number
+    st.text_input(number_to_dial, key="display_number", disabled=True)
+    
+    # Create dial pad
+    buttons = ['1', '2', '3', '4', '5', '6', '7', '8', '9', '*', '0', '#']
+    
+    # Create a 3x4 grid for the dial pad; callbacks run before the
+    # fragment re-renders, so the display is never one press behind
+    for i in range(0, 12, 3):
+        cols = st.columns(3)
+        for j in range(3):
+            if i + j < len(buttons):
+                digit = buttons[i + j]
+                cols[j].button(digit, key=f"btn_{digit}",
+                               on_click=lambda d=digit: _set_dialed_number(st.session_state.dialed_number + d))
+    
+    # Control buttons
+    col_call, col_clear = st.columns(2)
+    with col_call:
+        if st.button(call_button, use_container_width=True):
+            if st.session_state.dialed_number:
+                st.markdown(f"[{calling_text} {st.session_state.dialed_number}](tel:{st.session_state.dialed_number})", unsafe_allow_html=True)
+    
+    with col_clear:
+        st.button(clear_button, use_container_width=True, on_click=_set_dialed_number, args=("",))
+
 def appointment_booking():
     """Doctor Appointment Booking Interface"""
     current_lang = st.session_state.user_language
@@ -801,84 +889,95 @@ def appointment_booking():
     # Tab 2: Book Appointment
     with tab2:
         st.markdown('<div class="card">', unsafe_allow_html=True)
+        booking_form(current_lang, select_doctor, select_date, select_time, reason_label, book_button,
+                     appointment_booked, specialty_label, languages_spoken, availability)
+        st.markdown('</div>', unsafe_allow_html=True)
+
+@st.fragment
+def booking_form(current_lang, select_doctor, select_date, select_time, reason_label, book_button,
+                 appointment_booked, specialty_label, languages_spoken, availability):
+    """Doctor, date and time pickers; changing them reruns only this fragment"""
+    doctors = load_doctors()
+    
+    col1, col2 = st.columns([1, 1])
+    
+    with col1:
+        # Doctor selection
+        doctor_names = {doctor_id: translate_text(info["name"], current_lang) for doctor_id, info in doctors.items()}
+        selected_doctor_name = st.selectbox(select_doctor, list(doctor_names.values()))
         
-        doctors = load_doctors()
+        # Map back to doctor ID
+        selected_doctor_id = [did for did, name in doctor_names.items() if name == selected_doctor_name][0]
+        selected_doctor = doctors[selected_doctor_id]
         
-        col1, col2 = st.columns([1, 1])
+        # Appointment date and time
+        today = datetime.now().date()
+        min_date = today + timedelta(days=1)  # Start from tomorrow
+        max_date = today + timedelta(days=30)  # Allow booking up to 30 days ahead
         
-        with col1:
-            # Doctor selection
-            doctor_names = {doctor_id: translate_text(info["name"], current_lang) for doctor_id, info in doctors.items()}
-            selected_doctor_name = st.selectbox(select_doctor, list(doctor_names.values()))
-            
-            # Map back to doctor ID
-            selected_doctor_id = [did for did, name in doctor_names.items() if name == selected_doctor_name][0]
-            selected_doctor = doctors[selected_doctor_id]
-            
-            # Appointment date and time
-            today = datetime.now().date()
-            min_date = today + timedelta(days=1)  # Start from tomorrow
-            max_date = today + timedelta(days=30)  # Allow booking up to 30 days ahead
-            
-            # Get available dates based on doctor's availability
-            day_map = {
-                0: "Monday", 1: "Tuesday", 2: "Wednesday", 3: "Thursday", 
-                4: "Friday", 5: "Saturday", 6: "Sunday"
-            }
-            available_dates = []
-            for i in range(1, 31):
-                check_date = today + timedelta(days=i)
-                day_name = day_map[check_date.weekday()]
-                if day_name in selected_doctor["availability"]:
-                    available_dates.append(check_date)
-            
-            selected_date = st.date_input(select_date, min_value=min_date, max_value=max_date, value=available_dates[0] if available_dates else min_date)
-            
-            # Convert selected date to string format
-            formatted_date = selected_date.strftime("%Y-%m-%d")
-            
-            # Time selection
-            time_slots = ["09:00 AM", "10:00 AM", "11:00 AM", "12:00 PM", 
-                          "02:00 PM", "03:00 PM", "04:00 PM", "05:00 PM"]
-            selected_time = st.selectbox(select_time, time_slots)
-            
-            # Reason for visit
-            visit_reason = st.text_area(reason_label, placeholder=translate_text("Please describe your symptoms or reason for the appointment", current_lang))
+        # Get available dates based on doctor's availability
+        day_map = {
+            0: "Monday", 1: "Tuesday", 2: "Wednesday", 3: "Thursday", 
+            4: "Friday", 5: "Saturday", 6: "Sunday"
+        }
+        available_dates = []
+        for i in range(1, 31):
+            check_date = today + timedelta(days=i)
+            day_name = day_map[check_date.weekday()]
+            if day_name in selected_doctor["availability"]:
+                available_dates.append(check_date)
         
-        with col2:
-            # Display doctor information
-            if "image" in selected_doctor:
-                st.image(selected_doctor["image"], width=150)
-            
-            st.markdown(f"### {translate_text(selected_doctor['name'], current_lang)}")
-            
-            if "specialty" in selected_doctor:
-                st.markdown(f"**{specialty_label}:** {translate_text(selected_doctor['specialty'], current_lang)}")
-            
-            if "languages" in selected_doctor:
-                languages_list = [translate_text(lang, current_lang) for lang in selected_doctor["languages"]]
-                st.markdown(f"**{languages_spoken}:** {', '.join(languages_list)}")
-            
-            if "availability" in selected_doctor:
-                availability_list = [translate_text(day, current_lang) for day in selected_doctor["availability"]]
-                st.markdown(f"**{availability}:** {', '.join(availability_list)}")
-            
-            if "bio" in selected_doctor:
-                st.markdown(f"**{translate_text('Bio', current_lang)}:** {translate_text(selected_doctor['bio'], current_lang)}")
+        selected_date = st.date_input(select_date, min_value=min_date, max_value=max_date, value=available_dates[0] if available_dates else min_date)
         
-        # Book appointment button
-        book_clicked = st.button(book_button, use_container_width=True)
+        # Convert selected date to string format
+        formatted_date = selected_date.strftime("%Y-%m-%d")
         
-        if book_clicked:
-            if not visit_reason:
-                st.warning(translate_text("Please provide a reason for your visit.", current_lang))
-            else:
-                # Save the appointment
-                save_appointment(st.session_state.user, selected_doctor_id, formatted_date, selected_time, visit_reason)
-                st.success(appointment_booked)
-                st.rerun()
+        # Time selection, leaving out slots this doctor already has booked that day
+        time_slots = ["09:00 AM", "10:00 AM", "11:00 AM", "12:00 PM", 
+                      "02:00 PM", "03:00 PM", "04:00 PM", "05:00 PM"]
+        booked = {a["time"] for a in get_doctor_schedule(selected_doctor_id, formatted_date)}
+        time_slots = [slot for slot in time_slots if slot not in booked]
+        if not time_slots:
+            st.info(translate_text("No free time slots on this date. Please choose another date.", current_lang))
+        selected_time = st.selectbox(select_time, time_slots)
         
-        st.markdown('</div>', unsafe_allow_html=True)
+        # Reason for visit
+        visit_reason = st.text_area(reason_label, placeholder=translate_text("Please describe your symptoms or reason for the appointment", current_lang))
+    
+    with col2:
+        # Display doctor information
+        if "image" in selected_doctor:
+            st.image(selected_doctor["image"], width=150)
+        
+        st.markdown(f"### {translate_text(selected_doctor['name'], current_lang)}")
+        
+        if "specialty" in selected_doctor:
+            st.markdown(f"**{specialty_label}:** {translate_text(selected_doctor['specialty'], current_lang)}")
+        
+        if "languages" in selected_doctor:
+            languages_list = [translate_text(lang, current_lang) for lang in selected_doctor["languages"]]
+            st.markdown(f"**{languages_spoken}:** {', '.join(languages_list)}")
+        
+        if "availability" in selected_doctor:
+            availability_list = [translate_text(day, current_lang) for day in selected_doctor["availability"]]
+            st.markdown(f"**{availability}:** {', '.join(availability_list)}")
+        
+        if "bio" in selected_doctor:
+            st.markdown(f"**{translate_text('Bio', current_lang)}:** {translate_text(selected_doctor['bio'], current_lang)}")
+    
+    # Book appointment button
+    book_clicked = st.button(book_button, use_container_width=True)
+    
+    if book_clicked:
+        if not visit_reason:
+            st.warning(translate_text("Please provide a reason for your visit.", current_lang))
+        elif selected_time is None:
+            st.warning(translate_text("No free time slots on this date. Please choose another date.", current_lang))
+        else:
+            # Save the appointment
+            save_appointment(st.session_state.user, selected_doctor_id, formatted_date, selected_time, visit_reason)
+            st.success(appointment_booked)
+            st.rerun()
 
 def doctor_chat():
     """Doctor Chat Messaging Interface"""
@@ -894,7 +993,44 @@ def doctor_chat():
     st.markdown(f'<h2 class="subheader">{title}</h2>', unsafe_allow_html=True)
     
     st.markdown('<div class="card">', unsafe_allow_html=True)
+    doctor_chat_panel(current_lang, select_doctor, message_placeholder, send_button, no_messages)
+    st.markdown('</div>', unsafe_allow_html=True)
+
+DOCTOR_RESPONSES = [
+    "Thank you for your message. I'll review it and get back to you soon.",
+    "I've received your message. Let me check your medical history and respond shortly.",
+    "Thank you for reaching out. Based on what you've described, I recommend scheduling an appointment.",
+    "I understand your concern. Can you provide more details about when these symptoms started?",
+    "Thanks for your message. This might require further examination, please consider booking an appointment."
+]
+
+def send_doctor_message(doctor_id):
+    """Send button callback: runs before the rerun, so the input can be cleared"""
+    message_input = st.session_state.message_input
+    if not message_input:
+        return
+    
+    current_lang = st.session_state.user_language
     
+    # Save user message in the language it was typed in
+    save_doctor_chat_message(st.session_state.user, doctor_id, message_input, lang=current_lang)
+    
+    # Generate simple AI response for demo purposes, translated once here rather than on every render
+    import random
+    ai_response = random.choice(DOCTOR_RESPONSES)
+    translations = {}
+    if current_lang != "en":
+        result = page_translate(ai_response, "en", current_lang)
+        if not result.degraded:
+            translations[current_lang] = result.text
+    save_doctor_chat_message(st.session_state.user, doctor_id, ai_response, is_from_user=False, translations=translations)
+    
+    # Clear input
+    st.session_state.message_input = ""
+
+@st.fragment
+def doctor_chat_panel(current_lang, select_doctor, message_placeholder, send_button, no_messages):
+    """Doctor picker, history and message box; chatting reruns only this fragment"""
     # Load doctors
     doctors = load_doctors()
     
@@ -914,31 +1050,10 @@ def doctor_chat():
         chat_container = st.container(height=400)
         
         # Message input
-        message_input = st.text_area(translate_text("Message", current_lang), placeholder=message_placeholder, key="message_input")
+        st.text_area(translate_text("Message", current_lang), placeholder=message_placeholder, key="message_input")
         
         # Send button
-        if st.button(send_button, use_container_width=True):
-            if message_input:
-                # Save user message
-                save_doctor_chat_message(st.session_state.user, selected_doctor_id, message_input)
-                
-                # Generate simple AI response for demo purposes
-                responses = [
-                    "Thank you for your message. I'll review it and get back to you soon.",
-                    "I've received your message. Let me check your medical history and respond shortly.",
-                    "Thank you for reaching out. Based on what you've described, I recommend scheduling an appointment.",
-                    "I understand your concern. Can you provide more details about when these symptoms started?",
-                    "Thanks for your message. This might require further examination, please consider booking an appointment."
-                ]
-                import random
-                ai_response = random.choice(responses)
-                
-                # Save doctor's response with a slight delay to simulate real conversation
-                save_doctor_chat_message(st.session_state.user, selected_doctor_id, ai_response, is_from_user=False)
-                
-                # Clear input
-                st.session_state.message_input = ""
-                st.rerun()
+        st.button(send_button, use_container_width=True, on_click=send_doctor_message, args=(selected_doctor_id,))
     
     with col2:
         # Display doctor information
@@ -962,35 +1077,44 @@ def doctor_chat():
     
     # Display chat history in the container
     with chat_container:
-        chat_history = get_user_doctor_chats(st.session_state.user, selected_doctor_id)
+        # Stored translations are reused; only messages new to this language are translated, in one batch
+        chat_history = get_translated_doctor_chats(st.session_state.user, selected_doctor_id, current_lang)
         
         if not chat_history:
             st.info(no_messages)
         else:
-            for message in chat_history:
-                message_text = message["message"]
+            for message, message_text in chat_history:
                 timestamp = message["timestamp"]
                 
-                # Apply translation if needed
-                if current_lang != "en":
-                    message_text = translate_text(message_text, current_lang)
-                
                 # Format based on message sender
                 if message["from_user"]:
                     st.markdown(f'<div class="chat-message chat-outgoing">{message_text}<div class="chat-time">{timestamp}</div></div>', unsafe_allow_html=True)
                 else:
                     st.markdown(f'<div class="chat-message chat-incoming">{message_text}<div class="chat-time">{timestamp}</div></div>', unsafe_allow_html=True)
-    
-    st.markdown('</div>', unsafe_allow_html=True)
 
 
 # --- Main Application ---
+APP_INFO = """
+            **Health AI Dashboard**  
+            Version 2.0  
+            © 2025 Health AI Inc.
+            """
+
+SIDEBAR_LABELS = (
+    "Welcome", "Language", "Select Language", "Health Chatbot", "Medications", "Book Appointment",
+    "Chat with Doctor", "Video Call", "Upload Documents", "Emergency Services", "Dashboard", "Logout", APP_INFO
+)
+
 def main():
     """Main application controller"""
     # Initialize session state
     if "user" not in st.session_state:
         st.session_state.user = None
     
+    # Drop the login if its session token has expired or been revoked
+    if st.session_state.user and get_user_store().resolve_session(st.session_state.get("session_token")) != st.session_state.user:
+        st.session_state.user = None
+    
     if "user_language" not in st.session_state:
         st.session_state.user_language = "en"
     
@@ -1000,15 +1124,17 @@ def main():
     # Sidebar navigation when logged in
     if st.session_state.user:
         current_lang = st.session_state.user_language
+        # Sidebar chrome is translated once per language, not on every rerun
+        labels = translate_labels(SIDEBAR_LABELS, current_lang)
         
         with st.sidebar:
-            st.markdown(f"## 👤 {translate_text('Welcome', current_lang)}, {st.session_state.user}")
+            st.markdown(f"## 👤 {labels['Welcome']}, {st.session_state.user}")
             st.markdown("---")
             
             # Language selector in sidebar
-            st.markdown(f"### 🌐 {translate_text('Language', current_lang)}")
+            st.markdown(f"### 🌐 {labels['Language']}")
             selected_lang_label = st.selectbox(
-                translate_text("Select Language", current_lang),
+                labels["Select Language"],
                 list(LANGUAGES.values()),
                 index=list(LANGUAGES.keys()).index(current_lang),
                 key="sidebar_language"
@@ -1025,18 +1151,18 @@ def main():
             
             # Navigation menu with translated options
             nav_options = {
-                "💬 Health Chatbot": translate_text("Health Chatbot", current_lang),
-                "💊 Medications": translate_text("Medications", current_lang),
-                "🗓️ Book Appointment": translate_text("Book Appointment", current_lang),
-                "💬 Chat with Doctor": translate_text("Chat with Doctor", current_lang),
-                "📞 Video Call": translate_text("Video Call", current_lang),
-                "📄 Upload Documents": translate_text("Upload Documents", current_lang),
-                "🚨 Emergency Services": translate_text("Emergency Services", current_lang)
+                "💬 Health Chatbot": labels["Health Chatbot"],
+                "💊 Medications": labels["Medications"],
+                "🗓️ Book Appointment": labels["Book Appointment"],
+                "💬 Chat with Doctor": labels["Chat with Doctor"],
+                "📞 Video Call": labels["Video Call"],
+                "📄 Upload Documents": labels["Upload Documents"],
+                "🚨 Emergency Services": labels["Emergency Services"]
             }
             
             # Create the radio buttons with translated labels but keep original keys
             translated_options = [f"{k.split()[0]} {v}" for k, v in nav_options.items()]
-            selected_translated = st.radio(translate_text("Dashboard", current_lang), translated_options)
+            selected_translated = st.radio(labels["Dashboard"], translated_options)
             
             # Map back to original key
             for orig_key, translated_value in nav_options.items():
@@ -1045,21 +1171,18 @@ def main():
                     break
             
             st.markdown("---")
-            logout_text = translate_text("Logout", current_lang)
+            logout_text = labels["Logout"]
             st.markdown('<div class="danger-button">', unsafe_allow_html=True)
             if st.button(f"🔒 {logout_text}", use_container_width=True):
+                logout_user(st.session_state.get("session_token"))
+                st.session_state.pop("session_token", None)
                 del st.session_state.user
                 st.rerun()
             st.markdown('</div>', unsafe_allow_html=True)
             
             # App info
             st.markdown("---")
-            app_info = translate_text("""
-            **Health AI Dashboard**  
-            Version 2.0  
-            © 2025 Health AI Inc.
-            """, current_lang)
-            st.markdown(app_info)
+            st.markdown(labels[APP_INFO])
         
         # Main content area
         header_text = translate_text("Health AI Dashboard", current_lang)
@@ -1080,6 +1203,10 @@ def main():
             upload_documents()
         elif st.session_state.selected_page == "🚨 Emergency Services":
             emergency_call()
+        
+        # Rendered last so it also reflects fallbacks made while drawing this page
+        if current_lang != "en" and translation_degraded_recently():
+            st.sidebar.warning("⚠️ Translation is temporarily unavailable; some text is shown in English.")
     
     # Authentication pages when not logged in
     else:
@@ -0,0 +1,145 @@
+import uuid
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+
+from json_store import JsonFileStore
+
+
+class AppointmentStore(JsonFileStore):
+    """Appointments keyed by username, with in-memory secondary indexes.
+
+    The JSON file keeps its original layout ({username: [appointment, ...]}).
+    Indexes are rebuilt only when the file changes on disk and are updated
+    in place on writes made through the store.
+    """
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._by_id = {}            # id -> (username, appointment)
+        self._by_doctor_date = {}   # (doctor_id, date) -> [id, ...]
+        self._doctor_dates = {}     # doctor_id -> sorted [date, ...] (distinct)
+        self._by_status = {}        # status -> sorted [(date, time, id), ...]
+
+    # --- Indexing ---
+    def _rebuild(self):
+        self._by_id = {}
+        self._by_doctor_date = {}
+        self._doctor_dates = {}
+        self._by_status = {}
+        for username, appointments in self._data.items():
+            for appointment in appointments:
+                self._index(username, appointment)
+        for entries in self._by_status.values():
+            entries.sort()
+
+    def _index(self, username, appointment, keep_sorted=False):
+        appointment_id = appointment.get("id")
+        if appointment_id is None:
+            return
+        self._by_id[appointment_id] = (username, appointment)
+
+        doctor_id = appointment.get("doctor_id")
+        date = appointment.get("date", "")
+        key = (doctor_id, date)
+        if key not in self._by_doctor_date:
+            self._by_doctor_date[key] = []
+            insort(self._doctor_dates.setdefault(doctor_id, []), date)
+        self._by_doctor_date[key].append(appointment_id)
+
+        entry = (date, appointment.get("time", ""), appointment_id)
+        entries = self._by_status.setdefault(appointment.get("status"), [])
+        if keep_sorted:
+            insort(entries, entry)
+        else:
+            entries.append(entry)
+
+    def _unindex_status(self, appointment):
+        entries = self._by_status.get(appointment.get("status"), [])
+        entry = (appointment.get("date", ""), appointment.get("time", ""), appointment["id"])
+        i = bisect_left(entries, entry)
+        if i < len(entries) and entries[i] == entry:
+            del entries[i]
+
+    # --- User-keyed access ---
+    def all(self):
+        """Return the raw {username: [appointments]} mapping"""
+        with self._lock:
+            self._refresh()
+            return self._data
+
+    def get_user_appointments(self, username):
+        """Get a copy of the appointment list for a user"""
+        with self._lock:
+            self._refresh()
+            return list(self._data.get(username, []))
+
+    def add(self, username, doctor_id, date, time, reason):
+        """Create a new appointment and return its ID"""
+        with self._lock:
+            self._refresh()
+            appointment = {
+                "id": str(uuid.uuid4()),
+                "doctor_id": doctor_id,
+                "date": date,
+                "time": time,
+                "reason": reason,
+                "status": "Scheduled",
+                "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            }
+            self._data.setdefault(username, []).append(appointment)
+            self._index(username, appointment, keep_sorted=True)
+            self._save()
+            return appointment["id"]
+
+    def set_status(self, appointment_id, status, username=None):
+        """Update an appointment's status; optionally require it to belong to username"""
+        with self._lock:
+            self._refresh()
+            found = self._by_id.get(appointment_id)
+            if found is None or (username is not None and found[0] != username):
+                return False
+            appointment = found[1]
+            self._unindex_status(appointment)
+            appointment["status"] = status
+            insort(self._by_status.setdefault(status, []),
+                   (appointment.get("date", ""), appointment.get("time", ""), appointment_id))
+            self._save()
+            return True
+
+    # --- Indexed access ---
+    def get(self, appointment_id):
+        """Return (username, appointment) for an ID, or None"""
+        with self._lock:
+            self._refresh()
+            return self._by_id.get(appointment_id)
+
+    def doctor_schedule(self, doctor_id, date, status=None):
+        """Appointments for a doctor on a date (YYYY-MM-DD), sorted by time"""
+        return self.doctor_schedule_range(doctor_id, date, date, status)
+
+    def doctor_schedule_range(self, doctor_id, start_date, end_date, status=None):
+        """Appointments for a doctor between two dates inclusive, sorted by date and time"""
+        with self._lock:
+            self._refresh()
+            dates = self._doctor_dates.get(doctor_id, [])
+            result = []
+            for date in dates[bisect_left(dates, start_date):bisect_right(dates, end_date)]:
+                for appointment_id in self._by_doctor_date.get((doctor_id, date), []):
+                    username, appointment = self._by_id[appointment_id]
+                    if status is None or appointment.get("status") == status:
+                        result.append(dict(appointment, username=username))
+            result.sort(key=lambda x: (x["date"], x["time"]))
+            return result
+
+    def by_status(self, status, start_date=None, end_date=None):
+        """Appointments with a status, optionally limited to a date range, sorted by date and time"""
+        with self._lock:
+            self._refresh()
+            entries = self._by_status.get(status, [])
+            lo = 0 if start_date is None else bisect_left(entries, (start_date,))
+            hi = len(entries) if end_date is None else bisect_right(entries, (end_date, "\uffff"))
+            result = []
+            for _, _, appointment_id in entries[lo:hi]:
+                username, appointment = self._by_id[appointment_id]
+                result.append(dict(appointment, username=username))
+            return result
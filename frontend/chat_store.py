@@ -0,0 +1,79 @@
+from datetime import datetime
+
+from json_store import JsonFileStore
+
+
+class ChatStore(JsonFileStore):
+    """Doctor chat histories keyed by "<username>_<doctor_id>".
+
+    Each message records the language it was written in ("lang"; older
+    messages without one are English) and a "translations" dict ({lang:
+    text}) filled in when it is saved or first shown in a language, so a
+    history is translated once per language and re-renders are served from
+    the file.
+    """
+
+    @staticmethod
+    def chat_key(username, doctor_id):
+        return f"{username}_{doctor_id}"
+
+    def history(self, username, doctor_id):
+        """Messages between a user and a doctor, oldest first"""
+        with self._lock:
+            self._refresh()
+            return [dict(m) for m in self._data.get(self.chat_key(username, doctor_id), [])]
+
+    def add_message(self, username, doctor_id, message, from_user=True, lang="en", translations=None):
+        """Append a message written in lang, with any translations already known for it"""
+        entry = {
+            "message": message,
+            "from_user": from_user,
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "lang": lang,
+            "translations": dict(translations or {}),
+        }
+        with self._lock:
+            self._refresh()
+            self._data.setdefault(self.chat_key(username, doctor_id), []).append(entry)
+            self._save()
+        return entry
+
+    def translated_history(self, username, doctor_id, lang, translate_many):
+        """(message, text in lang) pairs for a chat.
+
+        Messages not yet translated into lang go to
+        translate_many(texts, source_lang, lang), one batch per source
+        language; it returns a translation or None per text. Successful
+        translations are saved with their messages, so each message is
+        translated at most once per language.
+        """
+        messages = self.history(username, doctor_id)
+        missing = {}  # source lang -> texts
+        for m in messages:
+            source = m.get("lang", "en")
+            if source != lang and lang not in m.get("translations", {}):
+                missing.setdefault(source, set()).add(m["message"])
+
+        # Translate outside the lock; other sessions keep reading meanwhile
+        found = {}  # (source lang, text) -> translation
+        for source, texts in missing.items():
+            texts = sorted(texts)
+            found.update(((source, src), dst) for src, dst in zip(texts, translate_many(texts, source, lang)) if dst)
+        if found:
+            with self._lock:
+                self._refresh()
+                for stored in self._data.get(self.chat_key(username, doctor_id), []):
+                    translation = found.get((stored.get("lang", "en"), stored["message"]))
+                    if translation is not None and lang not in stored.setdefault("translations", {}):
+                        stored["translations"][lang] = translation
+                self._save()
+
+        pairs = []
+        for m in messages:
+            source = m.get("lang", "en")
+            if source == lang:
+                pairs.append((m, m["message"]))
+            else:
+                text = m.get("translations", {}).get(lang) or found.get((source, m["message"]), m["message"])
+                pairs.append((m, text))
+        return pairs
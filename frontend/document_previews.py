@@ -0,0 +1,148 @@
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from PIL import Image
+except ImportError:  # Thumbnails are skipped without Pillow
+    Image = None
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:  # Falls back to text extraction
+    pdfium = None
+
+try:
+    from pypdf import PdfReader
+except ImportError:
+    PdfReader = None
+
+THUMBNAIL_SIZE = (256, 256)
+PREVIEW_TEXT_CHARS = 600
+PREVIEW_WORKERS = int(os.environ.get("PREVIEW_WORKERS", 2))
+PREVIEW_MAX_PENDING = int(os.environ.get("PREVIEW_MAX_PENDING", 32))
+
+
+class PreviewPipeline:
+    """Generates document thumbnails and text snippets on a bounded worker pool.
+
+    Results are cached next to the document blobs, so a preview is built
+    once per unique file. Requests never block: when the queue is full the
+    document is simply picked up again on a later render.
+    """
+
+    def __init__(self, store, max_workers=PREVIEW_WORKERS, max_pending=PREVIEW_MAX_PENDING):
+        self.store = store
+        self.cache_dir = os.path.join(store.root, "previews")
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="preview")
+        self._pending = set()
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _paths(self, doc_id):
+        base = os.path.join(self.cache_dir, doc_id)
+        return {"thumbnail": f"{base}.png", "text": f"{base}.txt", "meta": f"{base}.json"}
+
+    def get(self, document):
+        """Return the cached preview for a document, scheduling it if missing.
+
+        The result has a status of "ready", "pending" or "unavailable", plus
+        a thumbnail path and/or a text snippet when ready.
+        """
+        paths = self._paths(document["id"])
+        if os.path.exists(paths["meta"]):
+            with open(paths["meta"], "r") as f:
+                meta = json.load(f)
+            preview = {"status": meta["status"], "thumbnail": None, "text": None}
+            if meta.get("thumbnail"):
+                preview["thumbnail"] = paths["thumbnail"]
+            if meta.get("text"):
+                with open(paths["text"], "r", encoding="utf-8") as f:
+                    preview["text"] = f.read()
+            return preview
+        self.request(document)
+        return {"status": "pending", "thumbnail": None, "text": None}
+
+    def request(self, document):
+        """Queue preview generation unless it is cached, queued, or the queue is full"""
+        doc_id = document["id"]
+        with self._lock:
+            if doc_id in self._pending or len(self._pending) >= self.max_pending:
+                return False
+            if os.path.exists(self._paths(doc_id)["meta"]):
+                return False
+            self._pending.add(doc_id)
+        future = self._executor.submit(self._generate, dict(document))
+        future.add_done_callback(lambda _: self._done(doc_id))
+        return True
+
+    def _done(self, doc_id):
+        with self._lock:
+            self._pending.discard(doc_id)
+
+    def _generate(self, document):
+        paths = self._paths(document["id"])
+        source = self.store.blob_path(document["id"])
+        meta = {"status": "unavailable", "thumbnail": False, "text": False}
+        if document.get("type") == "application/pdf":
+            parts = {"thumbnail": self._pdf_thumbnail, "text": self._pdf_text}
+        else:
+            parts = {"thumbnail": self._image_thumbnail}
+        # Each part is recorded on its own, so one failing doesn't lose the other
+        for part, build in parts.items():
+            try:
+                meta[part] = build(source, paths)
+            except Exception as e:
+                logging.warning(f"Preview {part} failed for {document.get('name')}: {e}")
+        if meta["thumbnail"] or meta["text"]:
+            meta["status"] = "ready"
+        tmp_path = f"{paths['meta']}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, paths["meta"])
+
+    def _save_thumbnail(self, image, path):
+        image.thumbnail(THUMBNAIL_SIZE)
+        if image.mode not in ("RGB", "RGBA", "L"):
+            image = image.convert("RGB")
+        tmp_path = f"{path}.tmp"
+        image.save(tmp_path, format="PNG")
+        os.replace(tmp_path, path)
+
+    def _image_thumbnail(self, source, paths):
+        if Image is None:
+            return False
+        with Image.open(source) as image:
+            # Decode at reduced size where the format supports it (JPEG)
+            image.draft("RGB", THUMBNAIL_SIZE)
+            self._save_thumbnail(image, paths["thumbnail"])
+        return True
+
+    def _pdf_thumbnail(self, source, paths):
+        if pdfium is None or Image is None:
+            return False
+        pdf = pdfium.PdfDocument(source)
+        try:
+            page = pdf[0]
+            scale = THUMBNAIL_SIZE[1] / page.get_height()
+            self._save_thumbnail(page.render(scale=scale).to_pil(), paths["thumbnail"])
+        finally:
+            pdf.close()
+        return True
+
+    def _pdf_text(self, source, paths):
+        if PdfReader is None:
+            return False
+        reader = PdfReader(source)
+        text = (reader.pages[0].extract_text() or "").strip() if reader.pages else ""
+        if not text:
+            return False
+        with open(paths["text"], "w", encoding="utf-8") as f:
+            f.write(text[:PREVIEW_TEXT_CHARS])
+        return True
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,135 @@
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+from document_store import CHUNK_SIZE, check_document_url, sign_document_url
+
+DOCUMENT_SERVER_HOST = os.environ.get("DOCUMENT_SERVER_HOST", "localhost")
+# Not 8502: Streamlit falls back to the next free port after 8501
+DOCUMENT_SERVER_PORT = int(os.environ.get("DOCUMENT_SERVER_PORT", 8510))
+DOCUMENT_SERVER_URL = os.environ.get("DOCUMENT_SERVER_URL", f"http://{DOCUMENT_SERVER_HOST}:{DOCUMENT_SERVER_PORT}")
+
+RANGE_PATTERN = re.compile(r"bytes=(\d*)-(\d*)$")
+
+# Signed URLs are reused until this close to expiry, so embedded viewers don't reload on every rerun
+URL_REFRESH_SECONDS = 60
+_signed_urls = {}  # (username, doc_id) -> (url, expires)
+
+
+def parse_range(header, size):
+    """Parse a single-range Range header into (start, end) inclusive, or None if unsatisfiable"""
+    match = RANGE_PATTERN.match(header.strip())
+    if not match or size == 0:
+        return None
+    start, end = match.groups()
+    if start == "":
+        if end == "":
+            return None
+        length = min(int(end), size)
+        return (size - length, size - 1) if length else None
+    start = int(start)
+    end = int(end) if end else size - 1
+    if start >= size or end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+def make_handler(store):
+    class DocumentHandler(BaseHTTPRequestHandler):
+        """Serves stored documents with HTTP Range support"""
+
+        def do_HEAD(self):
+            self._serve(send_body=False)
+
+        def do_GET(self):
+            self._serve(send_body=True)
+
+        def log_message(self, format, *args):
+            pass
+
+        def _serve(self, send_body):
+            url = urlparse(self.path)
+            parts = url.path.strip("/").split("/")
+            if len(parts) != 2 or parts[0] != "documents":
+                self.send_error(404)
+                return
+            doc_id = parts[1]
+            query = {k: v[0] for k, v in parse_qs(url.query).items()}
+            username = query.get("user", "")
+            if not check_document_url(username, doc_id, query.get("exp"), query.get("sig")):
+                self.send_error(403)
+                return
+            document = store.get_document(username, doc_id)
+            path = store.blob_path(doc_id)
+            if document is None or not os.path.exists(path):
+                self.send_error(404)
+                return
+
+            size = os.path.getsize(path)
+            start, end = 0, size - 1
+            status = 200
+            range_header = self.headers.get("Range")
+            if range_header:
+                byte_range = parse_range(range_header, size)
+                if byte_range is None:
+                    self.send_response(416)
+                    self.send_header("Content-Range", f"bytes */{size}")
+                    self.end_headers()
+                    return
+                start, end = byte_range
+                status = 206
+
+            self.send_response(status)
+            self.send_header("Content-Type", document.get("type") or "application/octet-stream")
+            self.send_header("Content-Length", str(max(end - start + 1, 0)))
+            self.send_header("Accept-Ranges", "bytes")
+            self.send_header("Cache-Control", "private, max-age=300")
+            self.send_header("ETag", f'"{doc_id}"')
+            if status == 206:
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            self.end_headers()
+            if not send_body:
+                return
+
+            remaining = end - start + 1
+            with open(path, "rb") as f:
+                f.seek(start)
+                while remaining > 0:
+                    chunk = f.read(min(CHUNK_SIZE, remaining))
+                    if not chunk:
+                        break
+                    try:
+                        self.wfile.write(chunk)
+                    except (BrokenPipeError, ConnectionResetError):
+                        return
+                    remaining -= len(chunk)
+
+    return DocumentHandler
+
+
+def start_document_server(store, host=DOCUMENT_SERVER_HOST, port=DOCUMENT_SERVER_PORT):
+    """Start the document server on a daemon thread and return it"""
+    server = ThreadingHTTPServer((host, port), make_handler(store))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="document-server", daemon=True)
+    thread.start()
+    return server
+
+
+def document_url(username, doc_id):
+    """Signed URL for viewing one of a user's documents, stable until it nears expiry"""
+    now = time.time()
+    cached = _signed_urls.get((username, doc_id))
+    if cached and cached[1] - now > URL_REFRESH_SECONDS:
+        return cached[0]
+    if len(_signed_urls) > 10000:
+        for key, (_, expires) in list(_signed_urls.items()):
+            if expires - now <= URL_REFRESH_SECONDS:
+                _signed_urls.pop(key, None)
+    params = sign_document_url(username, doc_id)
+    url = f"{DOCUMENT_SERVER_URL}/documents/{doc_id}?{urlencode(params)}"
+    _signed_urls[(username, doc_id)] = (url, int(params["exp"]))
+    return url
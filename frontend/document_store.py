@@ -0,0 +1,125 @@
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+DOCUMENT_DIR = os.environ.get("DOCUMENT_DIR", "documents")
+CHUNK_SIZE = 1024 * 1024
+URL_TTL_SECONDS = 15 * 60
+
+# Signs document URLs; set DOCUMENT_URL_SECRET so links survive restarts
+_URL_SECRET = os.environ.get("DOCUMENT_URL_SECRET", "").encode("utf-8") or secrets.token_bytes(32)
+
+
+def sign_document_url(username, doc_id, ttl=URL_TTL_SECONDS):
+    """Return query parameters granting username temporary access to a document"""
+    expires = int(time.time()) + ttl
+    payload = f"{username}:{doc_id}:{expires}".encode("utf-8")
+    signature = hmac.new(_URL_SECRET, payload, hashlib.sha256).hexdigest()
+    return {"user": username, "exp": str(expires), "sig": signature}
+
+
+def check_document_url(username, doc_id, expires, signature):
+    """Validate parameters produced by sign_document_url"""
+    try:
+        if int(expires) < time.time():
+            return False
+    except (TypeError, ValueError):
+        return False
+    payload = f"{username}:{doc_id}:{expires}".encode("utf-8")
+    expected = hmac.new(_URL_SECRET, payload, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature or "")
+
+
+class DocumentStore:
+    """Content-addressed document storage with a per-user index.
+
+    Uploads are streamed to disk in chunks while being hashed, then renamed
+    to their SHA-256, so identical files are stored once no matter how many
+    users or times they are uploaded.
+    """
+
+    def __init__(self, root=DOCUMENT_DIR):
+        self.root = root
+        self.blob_dir = os.path.join(root, "blobs")
+        self.index_path = os.path.join(root, "index.json")
+        self._lock = threading.Lock()
+        os.makedirs(self.blob_dir, exist_ok=True)
+        self._index = self._load_index()
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _save_index(self):
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, self.index_path)
+
+    def blob_path(self, doc_id):
+        """Path of the stored content for a document ID (its SHA-256)"""
+        return os.path.join(self.blob_dir, doc_id[:2], doc_id)
+
+    def store(self, username, fileobj, name, content_type):
+        """Stream a file-like object to disk and record it for username"""
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.blob_dir, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                while True:
+                    chunk = fileobj.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    out.write(chunk)
+                    size += len(chunk)
+            doc_id = digest.hexdigest()
+            path = self.blob_path(doc_id)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if os.path.exists(path):
+                os.remove(tmp_path)
+            else:
+                os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        with self._lock:
+            documents = self._index.setdefault(username, [])
+            for document in documents:
+                if document["id"] == doc_id:
+                    return document
+            document = {
+                "id": doc_id,
+                "name": name,
+                "type": content_type,
+                "size": size,
+                "uploaded_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            }
+            documents.append(document)
+            self._save_index()
+            return document
+
+    def list_documents(self, username):
+        """Documents uploaded by a user, newest first"""
+        with self._lock:
+            return sorted(self._index.get(username, []), key=lambda d: d["uploaded_at"], reverse=True)
+
+    def get_document(self, username, doc_id):
+        """Metadata for one of the user's documents, or None"""
+        with self._lock:
+            for document in self._index.get(username, []):
+                if document["id"] == doc_id:
+                    return dict(document)
+        return None
@@ -0,0 +1,52 @@
+import json
+import os
+import threading
+
+
+class JsonFileStore:
+    """Base for stores kept in one JSON file.
+
+    The file is parsed only when its mtime or size changes, and writes go
+    through a temporary file and os.replace, so other processes never read
+    a half-written file. Subclasses keep their state in self._data and
+    guard access with self._lock.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._stamp = None
+        self._data = {}
+
+    def _file_stamp(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _parse(self, text):
+        return json.loads(text)
+
+    def _rebuild(self):
+        """Recompute anything derived from self._data after a reload"""
+
+    def _refresh(self):
+        """Reload if the file changed since the last read"""
+        stamp = self._file_stamp()
+        if stamp is not None and stamp == self._stamp:
+            return
+        data = {}
+        if stamp is not None:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = self._parse(f.read())
+        self._data = data
+        self._stamp = stamp
+        self._rebuild()
+
+    def _save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._data, f)
+        os.replace(tmp_path, self.path)
+        self._stamp = self._file_stamp()
@@ -0,0 +1,124 @@
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+from bisect import bisect_left
+
+TRANSLATION_CACHE = "medication_translations.json"
+PAGE_SIZE = 5
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+_cache_lock = threading.Lock()
+
+
+def tokenize(text):
+    return _TOKEN_PATTERN.findall(str(text).casefold())
+
+
+def entry_strings(entry):
+    """Every user-visible string of a knowledge base entry"""
+    return [entry["name"], entry["description"], *entry["medications"]]
+
+
+class MedicationIndex:
+    """Inverted index over condition and medication names, with prefix search.
+
+    When a translation table is given, translated names are indexed as
+    well, so users can search in their own language.
+    """
+
+    def __init__(self, entries, translations=None):
+        self.entries = list(entries)
+        self._postings = {}
+        translations = translations or {}
+        for i, entry in enumerate(self.entries):
+            names = [entry["name"], *entry.get("aliases", []), *entry["medications"]]
+            names += [translations[name] for name in names if name in translations]
+            for name in names:
+                for token in tokenize(name):
+                    self._postings.setdefault(token, set()).add(i)
+        self._tokens = sorted(self._postings)
+
+    def _match_prefix(self, prefix):
+        matches = set()
+        i = bisect_left(self._tokens, prefix)
+        while i < len(self._tokens) and self._tokens[i].startswith(prefix):
+            matches |= self._postings[self._tokens[i]]
+            i += 1
+        return matches
+
+    def search(self, query):
+        """Entries matching every word of the query as a prefix, in knowledge base order"""
+        tokens = tokenize(query)
+        if not tokens:
+            return list(self.entries)
+        matches = None
+        for token in tokens:
+            found = self._match_prefix(token)
+            matches = found if matches is None else matches & found
+            if not matches:
+                return []
+        return [self.entries[i] for i in sorted(matches)]
+
+
+def paginate(items, page, page_size=PAGE_SIZE):
+    """Return (items on page, page count) for a 1-based page number"""
+    pages = max(1, (len(items) + page_size - 1) // page_size)
+    page = min(max(page, 1), pages)
+    return items[(page - 1) * page_size:page * page_size], pages
+
+
+def _load_cache(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def load_translations(entries, lang, translate_many, path=TRANSLATION_CACHE):
+    """Translation table for every entry string in a language.
+
+    Strings missing from the on-disk cache are translated in one batch and
+    saved, so each string is translated once per language, ever.
+    """
+    if lang == "en":
+        return {}
+    with _cache_lock:
+        cache = _load_cache(path)
+        table = cache.get(lang, {})
+        missing = sorted({s for entry in entries for s in entry_strings(entry)} - set(table))
+        if missing:
+            translated = translate_many(missing, lang)
+            # Only cache real translations so failures are retried next time
+            table.update({src: dst for src, dst in zip(missing, translated) if dst and dst != src})
+            cache[lang] = table
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(cache, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        return table
+
+
+def main():
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from backend.knowledge_base import get_knowledge_base
+    from deep_translator import GoogleTranslator
+
+    parser = argparse.ArgumentParser(description="Precompute medication guide translations")
+    parser.add_argument("languages", nargs="+", help="Language codes, e.g. es fr ta")
+    args = parser.parse_args()
+
+    entries = get_knowledge_base().subset()
+    for lang in args.languages:
+        table = load_translations(
+            entries, lang,
+            lambda texts, target: GoogleTranslator(source="en", target=target).translate_batch(texts)
+        )
+        print(f"{lang}: {len(table)} strings cached")
+
+
+if __name__ == "__main__":
+    main()
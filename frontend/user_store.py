@@ -0,0 +1,199 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import re
+import secrets
+import time
+from datetime import datetime
+
+from json_store import JsonFileStore
+
+# scrypt cost parameters; lower N to trade hash strength for login throughput
+SCRYPT_N = int(os.environ.get("USER_SCRYPT_N", 2 ** 14))
+SCRYPT_R = int(os.environ.get("USER_SCRYPT_R", 8))
+SCRYPT_P = int(os.environ.get("USER_SCRYPT_P", 1))
+SESSION_TTL_SECONDS = int(os.environ.get("USER_SESSION_TTL", 12 * 60 * 60))
+
+# Top-level keys that leaked into the legacy flat format and are not users
+LEGACY_STRAY_KEYS = {"created_at", "language"}
+LEGACY_RECORD_PATTERN = re.compile(r'Username\s*:\s*"\s*([^"]*?)\s*"\s*Password\s*:\s*"([^"]*)"', re.IGNORECASE)
+
+
+def hash_password(password, n=None, r=None, p=None):
+    """Hash a password with a random salt, returning an encoded scrypt string"""
+    n, r, p = n or SCRYPT_N, r or SCRYPT_R, p or SCRYPT_P
+    salt = secrets.token_bytes(16)
+    digest = hashlib.scrypt(password.encode("utf-8"), salt=salt, n=n, r=r, p=p, maxmem=256 * n * r + 2 ** 20)
+    return "scrypt${}${}${}${}${}".format(
+        n, r, p,
+        base64.b64encode(salt).decode("ascii"),
+        base64.b64encode(digest).decode("ascii")
+    )
+
+
+def verify_password(password, encoded):
+    """Check a password against an encoded scrypt string in constant time"""
+    try:
+        scheme, n, r, p, salt, digest = encoded.split("$")
+        n, r, p = int(n), int(r), int(p)
+        salt, digest = base64.b64decode(salt), base64.b64decode(digest)
+    except (ValueError, AttributeError):
+        return False
+    if scheme != "scrypt":
+        return False
+    candidate = hashlib.scrypt(password.encode("utf-8"), salt=salt, n=n, r=r, p=p,
+                               maxmem=256 * n * r + 2 ** 20, dklen=len(digest))
+    return hmac.compare_digest(candidate, digest)
+
+
+def needs_rehash(encoded):
+    """True if a hash was made with cost parameters other than the current ones"""
+    try:
+        _, n, r, p, _, _ = encoded.split("$")
+    except ValueError:
+        return True
+    return (int(n), int(r), int(p)) != (SCRYPT_N, SCRYPT_R, SCRYPT_P)
+
+
+def parse_user_file(text):
+    """Parse users.json, tolerating the malformed legacy formats"""
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        data = None
+        stripped = text.strip()
+        if stripped.startswith("{"):
+            try:
+                # Trailing garbage after a valid object (e.g. an extra brace)
+                data, _ = json.JSONDecoder().raw_decode(stripped)
+            except json.JSONDecodeError:
+                data = None
+        if data is None:
+            data = {name: password for name, password in LEGACY_RECORD_PATTERN.findall(text)}
+    if not isinstance(data, dict):
+        return {}
+    return {
+        name: record for name, record in data.items()
+        if not (name in LEGACY_STRAY_KEYS and isinstance(record, str))
+    }
+
+
+class UserStore(JsonFileStore):
+    """User accounts with a username index, salted scrypt hashes and a session cache.
+
+    The file is parsed once and re-read only when it changes on disk.
+    Legacy plaintext entries are upgraded to hashed records the first time
+    the user logs in successfully.
+    """
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._sessions = {}  # token -> (username, expires_at)
+        self._dummy_hash = hash_password(secrets.token_hex(8))
+
+    def _parse(self, text):
+        return parse_user_file(text)
+
+    # --- Accounts ---
+    def exists(self, username):
+        with self._lock:
+            self._refresh()
+            return username in self._data
+
+    def create(self, username, password, language="en"):
+        """Create a new account; returns False if the username is taken"""
+        password_hash = hash_password(password)
+        with self._lock:
+            self._refresh()
+            if username in self._data:
+                return False
+            self._data[username] = {
+                "password_hash": password_hash,
+                "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "language": language
+            }
+            self._save()
+            return True
+
+    def verify(self, username, password):
+        """Validate credentials, migrating legacy plaintext records on success"""
+        with self._lock:
+            self._refresh()
+            record = self._data.get(username)
+
+        if record is None:
+            # Spend the same time as a real check so usernames can't be probed
+            verify_password(password, self._dummy_hash)
+            return False
+
+        if isinstance(record, dict) and "password_hash" in record:
+            if not verify_password(password, record["password_hash"]):
+                return False
+            if needs_rehash(record["password_hash"]):
+                self._migrate(username, password)
+            return True
+
+        legacy = record.get("password") if isinstance(record, dict) else record
+        if not isinstance(legacy, str) or not hmac.compare_digest(legacy.encode("utf-8"), password.encode("utf-8")):
+            return False
+        self._migrate(username, password)
+        return True
+
+    def _migrate(self, username, password):
+        password_hash = hash_password(password)
+        with self._lock:
+            self._refresh()
+            record = self._data.get(username)
+            upgraded = dict(record) if isinstance(record, dict) else {}
+            upgraded.pop("password", None)
+            upgraded["password_hash"] = password_hash
+            upgraded.setdefault("created_at", datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+            upgraded.setdefault("language", "en")
+            self._data[username] = upgraded
+            self._save()
+
+    def get_language(self, username):
+        with self._lock:
+            self._refresh()
+            record = self._data.get(username)
+            if isinstance(record, dict):
+                return record.get("language", "en")
+            return "en"
+
+    def set_language(self, username, language_code):
+        with self._lock:
+            self._refresh()
+            record = self._data.get(username)
+            if isinstance(record, dict) and record.get("language") != language_code:
+                record["language"] = language_code
+                self._save()
+
+    # --- Sessions ---
+    def login(self, username, password):
+        """Verify credentials and return a new session token, or None"""
+        if not self.verify(username, password):
+            return None
+        token = secrets.token_urlsafe(32)
+        with self._lock:
+            self._sessions[token] = (username, time.monotonic() + SESSION_TTL_SECONDS)
+        return token
+
+    def resolve_session(self, token):
+        """Return the username for a live session token, or None"""
+        if not token:
+            return None
+        with self._lock:
+            session = self._sessions.get(token)
+            if session is None:
+                return None
+            username, expires_at = session
+            if expires_at < time.monotonic():
+                del self._sessions[token]
+                return None
+            return username
+
+    def logout(self, token):
+        with self._lock:
+            self._sessions.pop(token, None)
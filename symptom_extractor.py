@@ -1,9 +1,14 @@
-import spacy
+import functools
 
-# Load the scispaCy medical NER model
-nlp = spacy.load("en_ner_bc5cdr_md")
+NER_MODEL = "en_ner_bc5cdr_md"
+
+@functools.lru_cache(maxsize=None)
+def get_nlp():
+    """Load the scispaCy medical NER model on first use; importing spaCy alone takes seconds"""
+    import spacy
+    return spacy.load(NER_MODEL)
 
 def extract_symptoms(text):
-    doc = nlp(text)
+    doc = get_nlp()(text)
     symptoms = [ent.text.lower() for ent in doc.ents if ent.label_ == "DISEASE"]
     return list(set(symptoms))  # remove duplicates
@@ -0,0 +1,201 @@
+"""Lightweight request tracing shared by the frontends and the backend.
+
+A trace is opened once per user request (``with trace("chatbot.diagnosis")``)
+and each stage inside it is timed with ``with span("translate.input")``.
+The request id lives in a context variable, is sent to the backend in the
+X-Request-ID header by backend_client, and is picked up again by the
+backend middleware, so one id ties the frontend and backend spans together.
+
+Set TRACE_PROFILE=1 to sample stacks while traces run; any request slower
+than TRACE_SLOW_MS is written to TRACE_PROFILE_DIR as folded stacks, the
+input format of flamegraph.pl and speedscope.
+"""
+import contextvars
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from contextlib import contextmanager
+
+REQUEST_ID_HEADER = "X-Request-ID"
+SLOW_MS = float(os.environ.get("TRACE_SLOW_MS", 500))
+TRACE_FILE = os.environ.get("TRACE_FILE")  # optional JSON-lines log of every trace
+PROFILE = os.environ.get("TRACE_PROFILE", "0") == "1"
+PROFILE_DIR = os.environ.get("TRACE_PROFILE_DIR", "traces")
+SAMPLE_INTERVAL = float(os.environ.get("TRACE_SAMPLE_INTERVAL", 0.005))
+
+logger = logging.getLogger("tracing")
+
+_request_id = contextvars.ContextVar("request_id", default=None)
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+# Finished traces, newest last, for inspection from a shell or debug page
+recent_traces = deque(maxlen=200)
+_file_lock = threading.Lock()
+
+
+class Trace:
+    """Spans recorded for one request"""
+
+    def __init__(self, name, request_id):
+        self.name = name
+        self.request_id = request_id
+        self.start = time.perf_counter()
+        self.duration_ms = None
+        self.spans = []
+        self.samples = Counter() if PROFILE else None
+        self.threads = set()
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "request_id": self.request_id,
+            "duration_ms": self.duration_ms,
+            "spans": self.spans,
+        }
+
+
+def new_request_id():
+    return uuid.uuid4().hex[:16]
+
+
+def current_request_id():
+    return _request_id.get()
+
+
+def percentile(sorted_values, fraction):
+    """Value at fraction (0-1) of an ascending list, as every latency report here computes it"""
+    if not sorted_values:
+        return None
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+
+def request_headers():
+    """Headers that carry the current request id to another service"""
+    request_id = _request_id.get()
+    return {REQUEST_ID_HEADER: request_id} if request_id else {}
+
+
+@contextmanager
+def trace(name, request_id=None):
+    """Root span for one request; reuses an incoming request id if given"""
+    current = Trace(name, request_id or _request_id.get() or new_request_id())
+    tokens = (_request_id.set(current.request_id), _current_trace.set(current), _current_span.set(None))
+    if PROFILE:
+        _sampler.watch(threading.get_ident(), current)
+    try:
+        yield current
+    finally:
+        current.duration_ms = (time.perf_counter() - current.start) * 1000
+        if PROFILE:
+            _sampler.unwatch(current)
+        _request_id.reset(tokens[0])
+        _current_trace.reset(tokens[1])
+        _current_span.reset(tokens[2])
+        _finish(current)
+
+
+@contextmanager
+def span(name, **attributes):
+    """Time one stage of the current trace; does nothing outside a trace"""
+    current = _current_trace.get()
+    if current is None:
+        yield
+        return
+    if PROFILE:
+        # Stages may run on worker threads (e.g. FastAPI's threadpool)
+        _sampler.watch(threading.get_ident(), current)
+    start = time.perf_counter()
+    token = _current_span.set(name)
+    try:
+        yield
+    finally:
+        _current_span.reset(token)
+        record = {
+            "name": name,
+            "parent": _current_span.get(),
+            "start_ms": (start - current.start) * 1000,
+            "duration_ms": (time.perf_counter() - start) * 1000,
+        }
+        if attributes:
+            record["attributes"] = attributes
+        current.spans.append(record)
+
+
+def _finish(current):
+    recent_traces.append(current)
+    if current.duration_ms >= SLOW_MS:
+        stages = ", ".join(f"{s['name']}={s['duration_ms']:.1f}ms" for s in current.spans)
+        logger.info(f"Slow request {current.request_id} {current.name} {current.duration_ms:.1f}ms: {stages}")
+        if current.samples:
+            write_folded(current)
+    if TRACE_FILE:
+        with _file_lock:
+            with open(TRACE_FILE, "a", encoding="utf-8") as f:
+                f.write(json.dumps(current.to_dict()) + "\n")
+
+
+def write_folded(current, directory=None):
+    """Write a trace's stack samples as folded stacks ("a;b;c count" per line)"""
+    directory = directory or PROFILE_DIR
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{current.request_id}.folded")
+    with open(path, "w", encoding="utf-8") as f:
+        for stack, count in current.samples.most_common():
+            f.write(f"{stack} {count}\n")
+    logger.info(f"Profile for {current.request_id} written to {path}")
+    return path
+
+
+def _fold(frame):
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class _Sampler:
+    """Background thread sampling the stacks of threads working on a trace"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._watched = {}  # thread id -> trace
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def watch(self, thread_id, current):
+        with self._lock:
+            self._watched[thread_id] = current
+            current.threads.add(thread_id)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="trace-sampler", daemon=True)
+                self._thread.start()
+
+    def unwatch(self, current):
+        with self._lock:
+            for thread_id in current.threads:
+                if self._watched.get(thread_id) is current:
+                    del self._watched[thread_id]
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                watched = dict(self._watched)
+            if not watched:
+                continue
+            frames = sys._current_frames()
+            for thread_id, current in watched.items():
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    current.samples[_fold(frame)] += 1
+
+
+_sampler = _Sampler(SAMPLE_INTERVAL)
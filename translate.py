@@ -1,11 +1,261 @@
-from deep_translator import GoogleTranslator
+"""Shared translation client for the frontends.
 
-def translate_text(text, source_lang, target_lang):
+Results are cached, concurrent identical requests share one provider call
+(single flight), and each provider is rate limited by a token bucket.
+When the provider is failing or over its rate, callers get the source text
+back marked as degraded rather than an exception, so pages still render
+(in English) and can tell the user why.
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+from tracing import percentile
+
+PROVIDER = os.environ.get("TRANSLATION_PROVIDER", "google")
+RATE_PER_SECOND = float(os.environ.get("TRANSLATION_RATE", 5.0))
+BURST = int(os.environ.get("TRANSLATION_BURST", 10))
+# How long a caller may wait for a rate-limit token before degrading
+MAX_WAIT_SECONDS = float(os.environ.get("TRANSLATION_MAX_WAIT", 0.5))
+CACHE_SIZE = int(os.environ.get("TRANSLATION_CACHE_SIZE", 10000))
+CALL_TIMEOUT_SECONDS = 15.0
+DEGRADED_WINDOW_SECONDS = 60
+
+Translation = namedtuple("Translation", ["text", "degraded"])
+
+
+class TokenBucket:
+    """Allows `rate` calls per second on average, in bursts of up to `burst`"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout=0.0, tokens=1):
+        """Take tokens, waiting up to timeout seconds; False if they didn't become available.
+
+        More than `burst` tokens can never be on hand at once, so such a
+        request waits for a full bucket and leaves it in debt; later calls
+        then wait until the average is back under `rate`.
+        """
+        needed = min(tokens, self.burst)
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= needed:
+                    self._tokens -= tokens
+                    return True
+                wait = (needed - self._tokens) / self.rate
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+def _google_translate(text, source_lang, target_lang):
+    from deep_translator import GoogleTranslator
     return GoogleTranslator(source=source_lang, target=target_lang).translate(text)
 
 
+def _google_translate_batch(texts, source_lang, target_lang):
+    from deep_translator import GoogleTranslator
+    return GoogleTranslator(source=source_lang, target=target_lang).translate_batch(list(texts))
+
+
+PROVIDERS = {}  # name -> (translate_fn, batch_fn, TokenBucket)
+
+
+def register_provider(name, translate_fn, batch_fn=None, rate=RATE_PER_SECOND, burst=BURST):
+    """Add a translation backend; batch_fn defaults to calling translate_fn per text"""
+    if batch_fn is None:
+        batch_fn = lambda texts, source, target: [translate_fn(t, source, target) for t in texts]
+    PROVIDERS[name] = (translate_fn, batch_fn, TokenBucket(rate, burst))
+
+
+register_provider("google", _google_translate, _google_translate_batch)
+
+_cache = OrderedDict()  # (provider, source, target, text) -> translation
+_in_flight = {}         # same key -> Future shared by concurrent callers
+_lock = threading.Lock()
+_latencies_ms = deque(maxlen=1000)
+_last_degraded = 0.0
+_unknown_providers = set()
+translation_stats = {
+    "requests": 0, "cache_hits": 0, "coalesced": 0, "provider_calls": 0,
+    "errors": 0, "rate_limited": 0, "degraded": 0,
+}
 
 
+def _count(name, amount=1):
+    global _last_degraded
+    with _lock:
+        translation_stats[name] += amount
+        if name == "degraded":
+            _last_degraded = time.monotonic()
+
+
+def _cache_put(key, text):
+    with _lock:
+        _cache[key] = text
+        _cache.move_to_end(key)
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def _call_provider(call, tokens=1):
+    """Run a provider call under its rate limit; None if limited or failed.
+
+    tokens is the number of provider requests the call makes (one per text
+    for a batch), so batches are rate limited like single calls.
+    """
+    provider = PROVIDERS.get(PROVIDER)
+    if provider is None:
+        # Misconfigured TRANSLATION_PROVIDER: degrade like any other provider failure
+        if PROVIDER not in _unknown_providers:
+            _unknown_providers.add(PROVIDER)
+            logging.error(f"Unknown translation provider {PROVIDER!r}; known: {', '.join(sorted(PROVIDERS))}")
+        _count("errors")
+        return None
+    translate_fn, batch_fn, bucket = provider
+    if not bucket.acquire(MAX_WAIT_SECONDS, tokens):
+        _count("rate_limited")
+        return None
+    start = time.perf_counter()
+    try:
+        return call(translate_fn, batch_fn)
+    except Exception:
+        _count("errors")
+        return None
+    finally:
+        _count("provider_calls")
+        with _lock:
+            _latencies_ms.append((time.perf_counter() - start) * 1000)
+
+
+def translate(text, source_lang, target_lang):
+    """Translation of one text, or the source text with degraded=True if unavailable"""
+    if not text or source_lang == target_lang:
+        return Translation(text, False)
+    key = (PROVIDER, source_lang, target_lang, text)
+    with _lock:
+        translation_stats["requests"] += 1
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+            translation_stats["cache_hits"] += 1
+            return Translation(cached, False)
+        future = _in_flight.get(key)
+        leader = future is None
+        if leader:
+            future = _in_flight[key] = Future()
+        else:
+            translation_stats["coalesced"] += 1
+
+    if leader:
+        result = None
+        try:
+            result = _call_provider(lambda fn, _: fn(text, source_lang, target_lang)) or None
+            if result is not None:
+                _cache_put(key, result)
+        finally:
+            with _lock:
+                del _in_flight[key]
+            future.set_result(result)
+    else:
+        try:
+            result = future.result(timeout=CALL_TIMEOUT_SECONDS)
+        except FutureTimeoutError:
+            result = None
+
+    if result is None:
+        _count("degraded")
+        return Translation(text, True)
+    return Translation(result, False)
+
+
+def translate_batch(texts, source_lang, target_lang):
+    """Translations for many texts with at most one provider call for the uncached ones.
+
+    Texts that another caller is already translating are waited for, not
+    requested again, and this call's own texts are registered in _in_flight
+    so concurrent translate() and translate_batch() calls wait for them.
+    """
+    texts = list(texts)
+    if source_lang == target_lang:
+        return [Translation(t, False) for t in texts]
+    results = {}
+    leading = {}    # text -> Future this call resolves
+    following = {}  # text -> Future another caller resolves
+    with _lock:
+        translation_stats["requests"] += len(texts)
+        for text in dict.fromkeys(texts):
+            key = (PROVIDER, source_lang, target_lang, text)
+            cached = _cache.get(key) if text else text
+            if cached is not None:
+                results[text] = cached
+            elif key in _in_flight:
+                following[text] = _in_flight[key]
+            else:
+                leading[text] = _in_flight[key] = Future()
+        translation_stats["cache_hits"] += sum(1 for t in texts if t in results)
+        translation_stats["coalesced"] += len(following)
+
+    missing = sorted(leading)
+    if missing:
+        try:
+            translated = _call_provider(lambda _, batch_fn: batch_fn(missing, source_lang, target_lang),
+                                        tokens=len(missing)) or []
+            for src, dst in zip(missing, translated):
+                if dst:
+                    results[src] = dst
+                    _cache_put((PROVIDER, source_lang, target_lang, src), dst)
+        finally:
+            with _lock:
+                for src in missing:
+                    del _in_flight[(PROVIDER, source_lang, target_lang, src)]
+            for src in missing:
+                leading[src].set_result(results.get(src))
+    for text, future in following.items():
+        try:
+            result = future.result(timeout=CALL_TIMEOUT_SECONDS)
+        except FutureTimeoutError:
+            result = None
+        if result is not None:
+            results[text] = result
+
+    output = [Translation(results[t], False) if t in results else Translation(t, True) for t in texts]
+    degraded = sum(1 for t in output if t.degraded)
+    if degraded:
+        _count("degraded", degraded)
+    return output
+
+
+def translate_text(text, source_lang, target_lang):
+    """Translated text, falling back to the source text"""
+    return translate(text, source_lang, target_lang).text
+
 
+def is_degraded(window=DEGRADED_WINDOW_SECONDS):
+    """Whether any translation fell back to the source text recently"""
+    return bool(_last_degraded) and time.monotonic() - _last_degraded < window
 
 
+def get_translation_stats():
+    """Counters plus provider latency percentiles (ms) over the last calls"""
+    with _lock:
+        stats = dict(translation_stats)
+        latencies = sorted(_latencies_ms)
+    if latencies:
+        stats["latency_p50_ms"] = percentile(latencies, 0.50)
+        stats["latency_p99_ms"] = percentile(latencies, 0.99)
+    stats["cache_size"] = len(_cache)
+    stats["degraded_recently"] = bool(is_degraded())
+    return stats